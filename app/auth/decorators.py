@@ -1,52 +1,80 @@
 # app/auth/decorators.py
-from functools import wraps
-from flask import request, current_app
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from app.users.models import User # Using the new users module path
+from functools import wraps, lru_cache
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from sqlalchemy import select
 
-def role_required(roles):
-    """Decorator to ensure user has one of the specified roles."""
+from app.extensions import db
+from app.users.models import User, Role
+from app.auth.tokens import current_user_id
+
+# Common misspellings or variants of "admin" that are accepted for admin-only routes
+ADMIN_ROLE_VARIANTS = ('admin', 'administrator', 'admininstrator')
+
+@lru_cache(maxsize=256)
+def _role_allowed(user_role_name, required_roles):
+    """Check a role name against a frozenset of lowercased required role names."""
+    user_role_name = user_role_name.lower()
+
+    # Check for exact match first
+    if user_role_name in required_roles:
+        return True
+
+    # Additional check for "admin" variants with typos (e.g., "Admininstrator" for "Administrator")
+    if 'admin' in required_roles:
+        return any(variant in user_role_name for variant in ADMIN_ROLE_VARIANTS)
+
+    return False
+
+def _active_role_name(user_id):
+    """Current role name of an active user in one small SELECT; None if inactive or missing."""
+    row = db.session.execute(
+        select(User.is_active, Role.name)
+        .outerjoin(Role, Role.id == User.role_id)
+        .where(User.id == user_id)
+    ).first()
+    if row is None or not row.is_active:
+        return None
+    return row.name
+
+def is_active_admin(user_id):
+    """Whether the user is active and holds the Admin role (or a variant), read from the database."""
+    user_role_name = _active_role_name(user_id)
+    return bool(user_role_name) and _role_allowed(user_role_name, frozenset({'admin'}))
+
+def role_required(roles, recheck=False):
+    """
+    Decorator to ensure user has one of the specified roles.
+
+    The role comes from the token's 'role' claim, so a role change or
+    deactivation only takes effect once the token expires, and tokens issued
+    without the claim are refused. With recheck=True the role and is_active
+    flag are instead read from the database on every call.
+    """
     if not isinstance(roles, list):
         roles = [roles]
+    required_roles = frozenset(role.lower() for role in roles)
 
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
             verify_jwt_in_request()
-            user_id = get_jwt_identity()
-            
-            # Convert user_id to int if it's a string
-            if isinstance(user_id, str):
-                try:
-                    user_id = int(user_id)
-                except ValueError:
-                    return {"message": "Invalid user identity"}, 401
-                    
-            current_user = User.query.get(user_id)
-            
-            # Check if user exists and has a role
-            if not current_user or not current_user.role:
+            if recheck:
+                user_role_name = _active_role_name(current_user_id())
+            else:
+                # The role is embedded in the token at login/refresh, so this is a dict lookup
+                user_role_name = get_jwt().get('role')
+
+            if not user_role_name or not _role_allowed(user_role_name, required_roles):
                 return {"message": "Insufficient permissions"}, 403
-                
-            # Check if user's role name matches any of the required roles
-            # Also match variations to handle typos (e.g., "Admininstrator" for "Administrator")
-            user_role_name = current_user.role.name.lower()
-            
-            # Check for exact match first
-            if any(role.lower() == user_role_name for role in roles):
-                return fn(*args, **kwargs)
-                
-            # Additional check for "admin" variants with typos
-            if 'admin' in [r.lower() for r in roles]:
-                # Check for common misspellings or variants of "admin"
-                admin_variants = ['admin', 'administrator', 'admininstrator']
-                if any(variant in user_role_name for variant in admin_variants):
-                    return fn(*args, **kwargs)
-            
-            return {"message": "Insufficient permissions"}, 403
+
+            return fn(*args, **kwargs)
         return wrapper
     return decorator
 
 def admin_required(fn):
-    """Decorator to ensure user has the 'Admin' role or any recognized variant."""
-    return role_required(['Admin'])(fn)
\ No newline at end of file
+    """
+    Decorator to ensure user has the 'Admin' role or any recognized variant.
+    Re-checked against the database so a demoted or deactivated admin loses
+    access immediately rather than when the token expires.
+    """
+    return role_required(['Admin'], recheck=True)(fn)
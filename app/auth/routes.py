@@ -1,9 +1,9 @@
 from flask import current_app, redirect, url_for, request 
 from flask_restx import Namespace, Resource 
-from flask_jwt_extended import create_access_token, create_refresh_token
 
 from app.extensions import db, oauth 
 from app.users.models import User, Role
+from app.auth.tokens import issue_tokens, build_user_claims
 # Import for Swagger documentation
 from app.users.routes import token_model_output 
 
@@ -144,8 +144,7 @@ class GoogleCallback(Resource):
              current_app.logger.warning(f"SSO login attempt for inactive user {email} (ID: {user.id}). Denying access.")
              return {"message": "User account is inactive. Please contact support."}, 403
 
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        access_token, refresh_token = issue_tokens(str(user.id), build_user_claims(user))
         
         current_app.logger.info(f"User {email} (ID: {user.id}) successfully logged in via Google SSO.")
         return {'access_token': access_token, 'refresh_token': refresh_token}, 200
@@ -1,5 +1,5 @@
 from flask import current_app, url_for
-from app.users.services import UserService
+from app.users.services import user_service
 from app.users.models import User, Role
 from app.extensions import db, oauth
 from app.core.errors import NotFoundError, BadRequestError, ForbiddenError
@@ -8,7 +8,7 @@ class AuthService:
     """Service for authentication operations."""
     
     def __init__(self):
-        self.user_service = UserService()
+        self.user_service = user_service
     
     def get_or_create_default_role(self, role_name_config_key='DEFAULT_USER_ROLE', default_rolename='User'):
         """Gets or creates a role, typically the default role for new users."""
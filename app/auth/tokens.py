@@ -0,0 +1,50 @@
+# app/auth/tokens.py
+import threading
+import time
+
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity
+
+# Access tokens minted by the refresh endpoint are reused for this many seconds,
+# so clients that refresh in a burst don't pay for a new signature each time.
+ACCESS_TOKEN_REUSE_SECONDS = 60
+
+_access_token_cache = {}
+_access_token_cache_lock = threading.Lock()
+
+def build_user_claims(user):
+    """Claims embedded in every token so authorization checks don't need the database."""
+    return {'role': user.role.name if user.role else None}
+
+def current_user_id():
+    """The authenticated user's id. Tokens are always issued with str(user.id) as identity."""
+    return int(get_jwt_identity())
+
+def issue_tokens(identity, additional_claims=None):
+    """Create an access/refresh token pair for the given identity."""
+    access_token = create_access_token(identity=identity, additional_claims=additional_claims)
+    refresh_token = create_refresh_token(identity=identity, additional_claims=additional_claims)
+    return access_token, refresh_token
+
+def refresh_access_token(identity, additional_claims=None):
+    """
+    Create an access token for the refresh endpoint.
+    Repeated refreshes for the same identity and claims within the same time
+    bucket return the token minted for the first one.
+    """
+    bucket = int(time.time()) // ACCESS_TOKEN_REUSE_SECONDS
+    key = (identity, bucket, tuple(sorted((additional_claims or {}).items())))
+
+    with _access_token_cache_lock:
+        token = _access_token_cache.get(key)
+        if token is not None:
+            return token
+
+    token = create_access_token(identity=identity, additional_claims=additional_claims)
+
+    with _access_token_cache_lock:
+        # Entries from older buckets can never be served again
+        stale_keys = [k for k in _access_token_cache if k[1] != bucket]
+        for stale_key in stale_keys:
+            del _access_token_cache[stale_key]
+        _access_token_cache.setdefault(key, token)
+        return _access_token_cache[key]
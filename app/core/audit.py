@@ -9,13 +9,17 @@ class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
     
     id = db.Column(db.Integer, primary_key=True)
-    entity_type = db.Column(db.String(64), nullable=False, index=True)
-    entity_id = db.Column(db.Integer, nullable=False, index=True)
+    entity_type = db.Column(db.String(64), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
     action = db.Column(db.String(16), nullable=False, index=True)  # create, update, delete
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     data = db.Column(db.Text, nullable=True)  # JSON string of changes
     
+    __table_args__ = (
+        db.Index('ix_audit_logs_entity', 'entity_type', 'entity_id'),
+    )
+    
     def __repr__(self):
         return f'<AuditLog {self.action} {self.entity_type}:{self.entity_id}>'
 
@@ -1,32 +1,83 @@
 # app/core/logging.py
+import atexit
+import copy
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from flask import request, g, has_request_context
+from flask.logging import default_handler
 import os
 import json
 
+def _add_request_info(record):
+    """Copy request and user info onto a log record."""
+    if has_request_context():
+        record.url = request.url
+        record.method = request.method
+        record.remote_addr = request.remote_addr
+        if hasattr(g, 'user_id'):
+            record.user_id = g.user_id
+        else:
+            record.user_id = 'unauthenticated'
+    else:
+        record.url = None
+        record.method = None
+        record.remote_addr = None
+        record.user_id = None
+
+class RequestContextFilter(logging.Filter):
+    """Stamps request info on records while still on the request thread."""
+    
+    def filter(self, record):
+        _add_request_info(record)
+        return True
+
 class RequestFormatter(logging.Formatter):
     """Formatter that includes request and user info."""
     
     def format(self, record):
-        if has_request_context():
-            record.url = request.url
-            record.method = request.method
-            record.remote_addr = request.remote_addr
-            if hasattr(g, 'user_id'):
-                record.user_id = g.user_id
-            else:
-                record.user_id = 'unauthenticated'
-        else:
-            record.url = None
-            record.method = None
-            record.remote_addr = None
-            record.user_id = None
+        # Records handed over by the queue listener were stamped on the request thread
+        if not hasattr(record, 'url'):
+            _add_request_info(record)
             
         return super().format(record)
 
+class LocalQueueHandler(QueueHandler):
+    """
+    QueueHandler for an in-process queue. The default prepare() formats the
+    message and traceback on the calling thread so records can be pickled; here
+    they never leave the process, so formatting is left to the listener thread.
+    """
+    
+    def prepare(self, record):
+        return copy.copy(record)
+
+# The listener and its handlers are process-wide; apps created later (e.g. one
+# per test) reuse them instead of stacking another set of handlers
+_queue_handler = None
+
 def configure_logging(app):
     """Configure application logging."""
+    global _queue_handler
+    level = logging.DEBUG if app.debug else logging.INFO
+    
+    if _queue_handler is None:
+        _queue_handler = _start_queue_handler(app)
+    
+    # The queue handler replaces Flask's default handler; leaving it (or
+    # propagation to the root logger) in place would print every record twice
+    app.logger.removeHandler(default_handler)
+    
+    # Add the handler to the app logger and to the 'app' package logger,
+    # which module-level loggers (logging.getLogger(__name__)) propagate to
+    for logger in (app.logger, logging.getLogger('app')):
+        if _queue_handler not in logger.handlers:
+            logger.addHandler(_queue_handler)
+        logger.setLevel(level)
+        logger.propagate = False
+
+def _start_queue_handler(app):
+    """Create the file and console handlers behind a queue listener and return the queue handler."""
     
     # Create logs directory if it doesn't exist
     logs_dir = os.path.join(app.root_path, '..', 'logs')
@@ -53,7 +104,13 @@ def configure_logging(app):
     )
     console_handler.setFormatter(console_formatter)
     
-    # Add handlers to the app logger
-    app.logger.addHandler(file_handler)
-    app.logger.addHandler(console_handler)
-    app.logger.setLevel(logging.DEBUG if app.debug else logging.INFO)
\ No newline at end of file
+    # Request threads only enqueue records; a background listener does the
+    # formatting and file/console I/O, so a burst of errors can't stall requests.
+    log_queue = queue.SimpleQueue()
+    queue_handler = LocalQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    return queue_handler
@@ -11,17 +11,20 @@ class BaseRepository:
         if model_class:
             self.model_class = model_class
     
-    def get_by_id(self, id):
-        """Get a record by ID."""
-        return self.model_class.query.get(id)
+    def get_by_id(self, id, options=None):
+        """Get a record by ID, applying optional loader options."""
+        # Session.get returns straight from the identity map when the row is already loaded
+        return db.session.get(self.model_class, id, options=options)
     
     def get_by_field(self, field, value):
         """Get a record by specific field."""
         return self.model_class.query.filter(getattr(self.model_class, field) == value).first()
     
-    def list(self, **filters):
-        """List all records with optional filters."""
+    def list(self, options=None, **filters):
+        """List all records with optional filters and loader options."""
         query = self.model_class.query
+        if options:
+            query = query.options(*options)
         for field, value in filters.items():
             if hasattr(self.model_class, field) and value is not None:
                 query = query.filter(getattr(self.model_class, field) == value)
@@ -0,0 +1,50 @@
+# app/core/transaction.py
+import logging
+from functools import wraps
+from flask import has_request_context
+from app.extensions import db
+from app.core.errors import APIError
+
+logger = logging.getLogger(__name__)
+
+def register_transaction_handlers(app):
+    """Commit each request's unit of work once, after the view has run."""
+    
+    @app.after_request
+    def commit_or_rollback(response):
+        # Services only flush; successful requests commit here, failed ones roll back
+        if response.status_code < 400:
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+        else:
+            db.session.rollback()
+        return response
+
+def transactional(fn):
+    """
+    Run a service method as one unit of work.
+    
+    Inside a request the session is flushed and the request hook commits; outside
+    one (CLI commands, scripts) the method's work is committed directly. Any error
+    rolls the session back; unexpected ones are logged before being re-raised.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            result = fn(*args, **kwargs)
+            if has_request_context():
+                db.session.flush()
+            else:
+                db.session.commit()
+            return result
+        except APIError:
+            db.session.rollback()
+            raise
+        except Exception:
+            db.session.rollback()
+            logger.exception('%s failed', fn.__qualname__)
+            raise
+    return wrapper
@@ -40,10 +40,11 @@ class UserCurrency(db.Model):
     
     # Relationships
     user = db.relationship('User', back_populates='currencies')
-    currency = db.relationship('Currency', back_populates='user_currencies')
+    currency = db.relationship('Currency', back_populates='user_currencies', lazy='joined')
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'currency_code', name='uq_user_currency'),
+        db.Index('ix_uc_user_default', 'user_id', 'is_default'),
     )
     
     def __repr__(self):
@@ -5,6 +5,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from app.extensions import db
 from app.auth.decorators import admin_required
+from app.currencies.models import Currency, UserCurrency
 
 # Create the currencies namespace
 ns = Namespace('currencies', description='Currency management operations')
@@ -44,42 +45,6 @@ success_model = ns.model('SuccessResponse', {
     'message': fields.String(description='Success message')
 })
 
-# Currency Models
-class Currency(db.Model):
-    """Model for available currencies in the system."""
-    __tablename__ = 'currencies'
-    
-    code = db.Column(db.String(3), primary_key=True)
-    name = db.Column(db.String(50), nullable=False)
-    symbol = db.Column(db.String(5), nullable=False)
-    is_active = db.Column(db.Boolean, default=True)
-    created_at = db.Column(db.DateTime, default=db.func.now())
-    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
-    
-    def __repr__(self):
-        return f'<Currency {self.code}>'
-
-class UserCurrency(db.Model):
-    """Model for user currency assignments."""
-    __tablename__ = 'user_currencies'
-    
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
-    currency_code = db.Column(db.String(3), db.ForeignKey('currencies.code', ondelete='CASCADE'), nullable=False)
-    is_default = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=db.func.now())
-    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
-    
-    # Define relationship to Currency
-    currency = db.relationship('Currency', lazy='joined')
-    
-    __table_args__ = (
-        db.UniqueConstraint('user_id', 'currency_code', name='uq_user_currency'),
-    )
-    
-    def __repr__(self):
-        return f'<UserCurrency user_id={self.user_id} currency={self.currency_code}>'
-
 # Routes
 @ns.route('/')
 class CurrencyList(Resource):
@@ -6,7 +6,9 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from authlib.integrations.flask_client import OAuth
 
-db = SQLAlchemy()
+# Keep attributes loaded after commit so write endpoints can serialize the
+# committed object without re-SELECTing it.
+db = SQLAlchemy(session_options={'expire_on_commit': False})
 migrate = Migrate()
 jwt = JWTManager()
-oauth = OAuth()
\ No newline at end of file
+oauth = OAuth()
@@ -1,8 +1,16 @@
 from app.extensions import db
+from sqlalchemy.ext.hybrid import hybrid_property
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import bcrypt
 import datetime
 import os
 
+# bcrypt releases the GIL while hashing, so a small bounded pool lets many
+# passwords (e.g. a bulk import) hash in parallel without unbounded threads.
+# A single hash gains nothing from it; call hash_password directly.
+_hash_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='password-hash')
+
 # Create a standardized password hashing method using bcrypt
 def hash_password(password):
     """Hash password using bcrypt with consistent encoding."""
@@ -10,6 +18,10 @@ def hash_password(password):
         password = password.encode('utf-8')
     return bcrypt.hashpw(password, bcrypt.gensalt()).decode('utf-8')
 
+def hash_password_async(password):
+    """Start hashing a password on the hashing pool. Returns a Future with the hash."""
+    return _hash_pool.submit(hash_password, password)
+
 def verify_password(stored_hash, password):
     """Verify password against stored hash with consistent encoding."""
     if not stored_hash:
@@ -31,11 +43,24 @@ def verify_password(stored_hash, password):
         print(f"Password verification error: {str(e)}")
         return False
 
+@lru_cache(maxsize=1)
+def _dummy_hash():
+    """bcrypt hash used when there is no real one to check against, computed on first use."""
+    return bcrypt.hashpw(b'dummy-password', bcrypt.gensalt())
+
+def verify_dummy_password(password):
+    """
+    Run a bcrypt check that always fails, so a missing user or password hash
+    costs the same time as a real verification. Always returns False.
+    """
+    verify_password(_dummy_hash(), password)
+    return False
+
 class Role(db.Model):
     __tablename__ = 'roles'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), unique=True, nullable=False)
-    users = db.relationship('User', backref='role', lazy='dynamic') # one-to-many
+    users = db.relationship('User', back_populates='role', lazy='dynamic') # one-to-many
 
     def __repr__(self):
         return f'<Role {self.name}>'
@@ -53,6 +78,30 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
+    # Declared here rather than as a backref so User.role exists at import time;
+    # joined-loaded since nearly every user read needs the role name
+    role = db.relationship('Role', back_populates='users', lazy='joined')
+    # user_currencies.user_id is ON DELETE CASCADE, so deleting a user needn't load them
+    currencies = db.relationship('UserCurrency', back_populates='user', cascade='all, delete-orphan', passive_deletes=True)
+
+    @hybrid_property
+    def has_password(self):
+        """Whether the user has a local password set."""
+        return self.password_hash is not None
+
+    @has_password.expression
+    def has_password(cls):
+        return cls.password_hash.isnot(None)
+
+    @hybrid_property
+    def is_sso_user(self):
+        """Whether the user is linked with Google SSO."""
+        return self.google_sso_id is not None
+
+    @is_sso_user.expression
+    def is_sso_user(cls):
+        return cls.google_sso_id.isnot(None)
+
     def set_password(self, password):
         """Set the password hash using bcrypt."""
         self.password_hash = hash_password(password)
@@ -64,9 +113,6 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.email}>'
     
-# Add this to the User class:
-currencies = db.relationship('UserCurrency', back_populates='user', cascade='all, delete-orphan')
-
 # Add this method to the User class:
 def get_current_currency(self):
     """Get the user's current working currency code."""
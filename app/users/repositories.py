@@ -1,15 +1,51 @@
 from app.core.repository import BaseRepository
 from app.users.models import User, Role
 from app.extensions import db
+from sqlalchemy import exists, select
+from sqlalchemy.orm import selectinload, raiseload
 
 class UserRepository(BaseRepository):
     """Repository for User model operations."""
     
     model_class = User
     
+    # Serializers always read user.role; any other relationship must be loaded
+    # explicitly instead of lazily firing one SELECT per user.
+    default_options = (selectinload(User.role), raiseload('*'))
+    
+    def get_by_id(self, id, options=None):
+        """Get a user by ID with the role eagerly loaded."""
+        return super().get_by_id(id, options or self.default_options)
+    
     def get_by_email(self, email):
-        """Get a user by email."""
-        return User.query.filter_by(email=email).first()
+        """Get a user by email with the role eagerly loaded."""
+        return User.query.options(*self.default_options).filter_by(email=email).first()
+    
+    def list(self, options=None, **filters):
+        """List users with the role eagerly loaded."""
+        return super().list(options or self.default_options, **filters)
+    
+    def list_summary(self, after_id=None, limit=50, **filters):
+        """
+        List id/name/email/is_active/role_name rows ordered by id, starting after
+        `after_id` (keyset pagination). Returns plain rows, not User objects.
+        """
+        stmt = (
+            select(User.id, User.name, User.email, User.is_active, Role.name.label('role_name'))
+            .outerjoin(Role, Role.id == User.role_id)
+            .order_by(User.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(User.id > after_id)
+        for field, value in filters.items():
+            if hasattr(User, field) and value is not None:
+                stmt = stmt.where(getattr(User, field) == value)
+        return db.session.execute(stmt).all()
+    
+    def any_with_role(self, role_id):
+        """Check whether any user is assigned the given role."""
+        return db.session.query(exists().where(User.role_id == role_id)).scalar()
     
     def get_by_google_sso_id(self, google_sso_id):
         """Get a user by Google SSO ID."""
@@ -30,6 +66,10 @@ class RoleRepository(BaseRepository):
         """Get a role by name."""
         return Role.query.filter_by(name=name).first()
     
+    def name_taken_by_other(self, name, role_id):
+        """Check whether another role already uses the given name."""
+        return db.session.query(Role.id).filter(Role.name == name, Role.id != role_id).first() is not None
+    
     def get_default_role(self):
         """Get the default role for new users."""
         from flask import current_app
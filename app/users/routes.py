@@ -1,14 +1,22 @@
-from flask import request, current_app # Added current_app for logging/config access
+import csv
+import io
+
+from flask import request, current_app, Response, stream_with_context
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token, create_refresh_token
+from marshmallow import ValidationError
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select, bindparam, exists, delete
+from sqlalchemy.orm import joinedload
 
-from app.extensions import db # Import db from extensions
-from app.users.models import User, Role
+from app.extensions import db
+from app.users.models import User, Role, hash_password, verify_dummy_password
 from app.users.schemas import (
-    UserSchema, UserLoginSchema, RoleSchema, UserRegistrationSchema, 
-    UserProfileUpdateSchema, UserUpdateAdminSchema, BaseUserSchema
+    RoleSchema, UserRegistrationSchema, UserLoginSchema,
+    UserProfileUpdateSchema, UserUpdateAdminSchema, dump_user, dump_role
 )
-from app.auth.decorators import admin_required
+from app.users.services import role_service
+from app.auth.decorators import admin_required, is_active_admin
+from app.auth.tokens import issue_tokens, refresh_access_token, build_user_claims, current_user_id
 
 ns = Namespace('users', description='User management operations')
 
@@ -76,23 +84,87 @@ role_input_model = ns.model('RoleInput', {
     'name': fields.String(required=True, description='Role name', example='Sales')
 })
 
+# Query parameters for the admin user listing
+user_list_params = ns.parser()
+user_list_params.add_argument('limit', type=int, default=100, location='args', help='Maximum number of users to return (default 100, max 1000)')
+user_list_params.add_argument('offset', type=int, default=0, location='args', help='Number of users to skip')
+
+USER_LIST_MAX_LIMIT = 1000
+USER_EXPORT_BATCH_SIZE = 1000
+
 # --- Marshmallow Schema Instances --- 
 # (using specific schemas for clarity rather than one generic UserSchema with many variations)
 user_registration_schema = UserRegistrationSchema()
 user_profile_update_schema = UserProfileUpdateSchema()
 user_update_admin_schema = UserUpdateAdminSchema(partial=True) # Admin updates are partial
 user_login_schema = UserLoginSchema()
-base_user_schema = BaseUserSchema() # For dumping user info
-base_users_schema = BaseUserSchema(many=True)
 role_schema = RoleSchema()
-roles_schema = RoleSchema(many=True)
+# Responses are serialized with dump_user/dump_role rather than schema.dump
+
+# --- Column projection for list endpoints ---
+# Selects only what the user output model needs; has_password/is_sso_user come back
+# as booleans so the password hash never leaves the database.
+_user_list_stmt = (
+    select(
+        User.id, User.name, User.email, User.is_active, User.currency_context,
+        User.created_at, User.updated_at,
+        User.has_password.label('has_password'),
+        User.is_sso_user.label('is_sso_user'),
+        Role.id.label('role_id'), Role.name.label('role_name')
+    )
+    .select_from(User)
+    .outerjoin(Role, Role.id == User.role_id)
+    .order_by(User.id)
+)
 
-# --- Helper for computed fields --- 
-def _populate_computed_fields(user_obj, user_data_dict):
-    """Adds computed fields like has_password and is_sso_user to a user data dictionary."""
-    user_data_dict['has_password'] = bool(user_obj.password_hash)
-    user_data_dict['is_sso_user'] = bool(user_obj.google_sso_id)
-    return user_data_dict
+_role_list_stmt = select(Role.id, Role.name).order_by(Role.id)
+
+# Statement reused on every login; built once so SQLAlchemy's
+# compiled cache serves it without re-walking the expression each request.
+_user_by_email_stmt = select(User).options(joinedload(User.role)).where(User.email == bindparam('email'))
+
+def _get_or_404(model, pk, options=None):
+    """Primary-key lookup through the session identity map; aborts with 404 if missing."""
+    obj = db.session.get(model, pk, options=options)
+    if obj is None:
+        ns.abort(404, status='error', message=f'{model.__name__} not found')
+    return obj
+
+def _email_taken(email, exclude_id=None):
+    """SELECT EXISTS check for a user with this email, optionally ignoring one user id."""
+    condition = User.email == email
+    if exclude_id is not None:
+        condition = condition & (User.id != exclude_id)
+    return db.session.query(exists().where(condition)).scalar()
+
+def _role_name_taken(name, exclude_id=None):
+    """SELECT EXISTS check for a role with this name, optionally ignoring one role id."""
+    condition = Role.name == name
+    if exclude_id is not None:
+        condition = condition & (Role.id != exclude_id)
+    return db.session.query(exists().where(condition)).scalar()
+
+def _load_or_400(schema):
+    """Validates and deserializes the JSON body in one pass; aborts with 400 on errors."""
+    try:
+        return schema.load(request.get_json(cache=True) or {})
+    except ValidationError as err:
+        ns.abort(400, status='error', errors=err.messages)
+
+def _user_row_to_dict(row):
+    """Converts a projected user row into the user output shape."""
+    return {
+        'id': row.id,
+        'name': row.name,
+        'email': row.email,
+        'is_active': row.is_active,
+        'currency_context': row.currency_context,
+        'role': {'id': row.role_id, 'name': row.role_name} if row.role_id is not None else None,
+        'has_password': row.has_password,
+        'is_sso_user': row.is_sso_user,
+        'created_at': row.created_at,
+        'updated_at': row.updated_at
+    }
 
 # Updated User Routes with Proper Status Responses
 # Replace or modify the routes in app/users/routes.py
@@ -113,10 +185,9 @@ class UserSelf(Resource):
     @ns.response(404, 'User not found')
     def get(self):
         """Get your own user profile"""
-        user_id = get_jwt_identity()
-        user = User.query.get_or_404(user_id)
-        dumped_data = base_user_schema.dump(user)
-        return _populate_computed_fields(user, dumped_data)
+        user_id = current_user_id()
+        user = _get_or_404(User, user_id, options=[joinedload(User.role)])
+        return dump_user(user)
 
     @jwt_required()
     @ns.expect(user_profile_update_input_model)
@@ -128,20 +199,14 @@ class UserSelf(Resource):
     @ns.response(404, 'User not found')
     def put(self):
         """Update your own user profile. Password change is restricted for SSO users."""
-        user_id = get_jwt_identity()
-        user = User.query.get_or_404(user_id)
-        data = request.json
-
-        val_errors = user_profile_update_schema.validate(data)
-        if val_errors:
-            return {'status': 'error', 'errors': val_errors}, 400
-
-        user.name = data.get('name', user.name)
-        user.currency_context = data.get('currency_context', user.currency_context)
+        user_id = current_user_id()
+        user = _get_or_404(User, user_id, options=[joinedload(User.role)])
+        data = _load_or_400(user_profile_update_schema)
 
         current_password = data.get('current_password')
         new_password = data.get('new_password')
 
+        # Validate the password change before touching the user
         if new_password:
             if user.google_sso_id:
                 # SSO users cannot set/change password
@@ -152,18 +217,28 @@ class UserSelf(Resource):
                 pass 
             elif not user.check_password(current_password):
                 ns.abort(400, status='error', message='Incorrect current password.')
+
+        changes = {
+            field: data[field] for field in ('name', 'currency_context')
+            if data.get(field) is not None and data[field] != getattr(user, field)
+        }
+        # When nothing differs from what is stored, skip the write and the COMMIT
+        # but answer exactly as a real update would
+        if changes or new_password:
+            for field, value in changes.items():
+                setattr(user, field, value)
             
-            user.set_password(new_password)
+            if new_password:
+                user.set_password(new_password)
 
-        try:
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error updating user profile for {user.email}: {e}", exc_info=True)
-            ns.abort(500, status='error', message='Could not update profile due to a server error.')
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Error updating user profile for {user.email}: {e}", exc_info=True)
+                ns.abort(500, status='error', message='Could not update profile due to a server error.')
         
-        dumped_data = base_user_schema.dump(user)
-        result = _populate_computed_fields(user, dumped_data)
+        result = dump_user(user)
         result['status'] = 'success'
         result['message'] = 'Profile updated successfully'
         return result
@@ -183,12 +258,9 @@ class UserRegister(Resource):
     @admin_required
     def post(self):
         """Register a new user (Admin action). Requires Admin role."""
-        data = request.json
-        val_errors = user_registration_schema.validate(data)
-        if val_errors:
-            ns.abort(400, status='error', errors=val_errors)
+        data = _load_or_400(user_registration_schema)
 
-        if User.query.filter_by(email=data['email']).first():
+        if _email_taken(data['email']):
             ns.abort(409, status='error', message='User already exists with this email')
         
         new_user = User(
@@ -197,14 +269,17 @@ class UserRegister(Resource):
             is_active=data.get('is_active', True),
             currency_context=data.get('currency_context', current_app.config.get('DEFAULT_CURRENCY', 'SGD'))
         )
-        new_user.set_password(data['password'])
 
         if 'role_id' in data and data['role_id']:
-            role = Role.query.get(data['role_id'])
+            role = role_service.get_cached_role(data['role_id'])
             if role:
                 new_user.role = role
             else:
                 ns.abort(404, status='error', message=f"Role with ID {data['role_id']} not found")
+
+        # Hash only once the request can succeed, so conflicting requests don't
+        # spend a bcrypt round; there is nothing left to overlap it with
+        new_user.password_hash = hash_password(data['password'])
         
         try:
             db.session.add(new_user)
@@ -214,8 +289,7 @@ class UserRegister(Resource):
             current_app.logger.error(f"Error registering new user {data['email']}: {e}", exc_info=True)
             ns.abort(500, status='error', message='Could not register user due to a server error')
 
-        dumped_data = base_user_schema.dump(new_user)
-        result = _populate_computed_fields(new_user, dumped_data)
+        result = dump_user(new_user)
         result['status'] = 'success'
         result['message'] = 'User created successfully'
         return result, 201
@@ -229,19 +303,29 @@ class UserLogin(Resource):
     @ns.response(403, 'Account inactive')
     def post(self):
         """Authenticate user with email/password and return tokens"""
-        data = request.json
-        val_errors = user_login_schema.validate(data)
-        if val_errors:
-            return {'status': 'error', 'errors': val_errors}, 400
-
-        user = User.query.filter_by(email=data['email']).first()
-        if user and user.password_hash and user.check_password(data['password']):
+        data = request.get_json(cache=True) or {}
+        is_dict = isinstance(data, dict)
+        email = data.get('email') if is_dict else None
+        password = data.get('password') if is_dict else None
+        # Login is the hottest endpoint, so well-formed payloads skip marshmallow;
+        # anything else goes through the schema for the usual error body
+        if not isinstance(email, str) or '@' not in email or not isinstance(password, str) or not password:
+            val_errors = user_login_schema.validate(data)
+            if val_errors:
+                return {'status': 'error', 'errors': val_errors}, 400
+
+        user = db.session.execute(_user_by_email_stmt, {'email': email}).scalar_one_or_none()
+        if user and user.password_hash:
+            valid = user.check_password(password)
+        else:
+            # Same bcrypt cost as a real check, so unknown emails can't be detected by timing
+            valid = verify_dummy_password(password)
+
+        if valid:
             if not user.is_active:
                 return {'status': 'error', 'message': 'User account is inactive'}, 403
             
-            user_id_str = str(user.id)
-            access_token = create_access_token(identity=user_id_str)
-            refresh_token = create_refresh_token(identity=user_id_str)
+            access_token, refresh_token = issue_tokens(str(user.id), build_user_claims(user))
             
             return {
                 'status': 'success',
@@ -259,12 +343,13 @@ class TokenRefresh(Resource):
     @ns.response(401, 'Invalid or expired refresh token')
     def post(self):
         """Refresh access token using a valid refresh token"""
-        current_user_id = get_jwt_identity()
-        # Ensure user_id is a string
-        if not isinstance(current_user_id, str):
-            current_user_id = str(current_user_id)
+        user_id = current_user_id()
             
-        new_access_token = create_access_token(identity=current_user_id)
+        # Re-read the role so role changes reach new access tokens without a re-login
+        role_name = db.session.execute(
+            select(Role.name).join(User, User.role_id == Role.id).where(User.id == user_id)
+        ).scalar()
+        new_access_token = refresh_access_token(str(user_id), {'role': role_name})
         return {
             'status': 'success',
             'message': 'Token refreshed successfully',
@@ -273,6 +358,7 @@ class TokenRefresh(Resource):
 
 @ns.route('/')
 class UserList(Resource):
+    @ns.expect(user_list_params)
     @ns.marshal_list_with(user_model_output)
     @ns.response(200, 'Success')
     @ns.response(401, 'Unauthorized')
@@ -280,15 +366,48 @@ class UserList(Resource):
     @jwt_required()
     @admin_required
     def get(self):
-        """List all users (Admin action)."""
-        users = User.query.all()
-        dumped_data_list = []
-        for user in users:
-            dumped_data = base_user_schema.dump(user)
-            user_data = _populate_computed_fields(user, dumped_data)
-            dumped_data_list.append(user_data)
-        
-        return dumped_data_list
+        """List users ordered by ID (Admin action). Paginated with limit/offset, 100 users per page by default."""
+        args = user_list_params.parse_args()
+        limit = min(max(args['limit'], 1), USER_LIST_MAX_LIMIT)
+        offset = max(args['offset'], 0)
+
+        stmt = _user_list_stmt.limit(limit).offset(offset)
+        return [_user_row_to_dict(row) for row in db.session.execute(stmt)]
+
+@ns.route('/export')
+class UserExport(Resource):
+    @ns.produces(['text/csv'])
+    @ns.response(200, 'CSV export of all users')
+    @ns.response(401, 'Unauthorized')
+    @ns.response(403, 'Forbidden - Admin access required')
+    @jwt_required()
+    @admin_required
+    def get(self):
+        """Export all users as CSV (Admin action). Rows are streamed from the database in batches."""
+        columns = ['id', 'name', 'email', 'is_active', 'currency_context', 'role_id', 'role_name',
+                   'has_password', 'is_sso_user', 'created_at', 'updated_at']
+
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+
+            result = db.session.execute(
+                _user_list_stmt.execution_options(stream_results=True)
+            ).yield_per(USER_EXPORT_BATCH_SIZE)
+            for partition in result.partitions():
+                for row in partition:
+                    writer.writerow([getattr(row, column) for column in columns])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            yield buffer.getvalue()
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=users.csv'}
+        )
 
 @ns.route('/<int:user_id>')
 @ns.response(200, 'Success')
@@ -300,23 +419,15 @@ class UserResource(Resource):
     @jwt_required()
     def get(self, user_id):
         """Get a specific user's details. Admins can get any; users can get their own."""
-        requesting_user_id = get_jwt_identity()
-        
-        # Convert requesting_user_id to int if it's a string
-        if isinstance(requesting_user_id, str):
-            try:
-                requesting_user_id = int(requesting_user_id)
-            except ValueError:
-                ns.abort(401, status='error', message='Invalid user identity')
+        requesting_user_id = current_user_id()
                 
-        requesting_user = User.query.get(requesting_user_id)
-        
-        if not (requesting_user.role and requesting_user.role.name == 'Admin') and requesting_user_id != user_id:
+        # Reading your own profile needs no role check; reading anyone else's is
+        # re-checked in the database, as admin_required does
+        if requesting_user_id != user_id and not is_active_admin(requesting_user_id):
             ns.abort(403, status='error', message='You can only view your own profile or you need admin privileges')
         
-        user = User.query.get_or_404(user_id)
-        dumped_data = base_user_schema.dump(user)
-        result = _populate_computed_fields(user, dumped_data)
+        user = _get_or_404(User, user_id, options=[joinedload(User.role)])
+        result = dump_user(user)
         result['status'] = 'success'
         return result
 
@@ -332,16 +443,13 @@ class UserResource(Resource):
     @admin_required
     def put(self, user_id):
         """Update a user's details (Admin action)."""
-        user = User.query.get_or_404(user_id)
-        data = request.json
-        val_errors = user_update_admin_schema.validate(data)
-        if val_errors:
-            ns.abort(400, status='error', errors=val_errors)
+        user = _get_or_404(User, user_id, options=[joinedload(User.role)])
+        data = _load_or_400(user_update_admin_schema)
 
         user.name = data.get('name', user.name)
         new_email = data.get('email')
         if new_email and new_email != user.email:
-            if User.query.filter(User.email == new_email, User.id != user_id).first():
+            if _email_taken(new_email, exclude_id=user_id):
                 ns.abort(409, status='error', message='Email already in use by another account')
             user.email = new_email
         
@@ -351,15 +459,17 @@ class UserResource(Resource):
 
         if 'role_id' in data:
             if data['role_id'] is not None:
-                role = Role.query.get(data['role_id'])
+                role = role_service.get_cached_role(data['role_id'])
                 if not role:
                     ns.abort(404, status='error', message=f"Role with ID {data['role_id']} not found")
-                user.role_id = role.id
+                # Assign the relationship (not just role_id) so the response reflects it without a reload
+                user.role = role
             else:
-                user.role_id = None
+                user.role = None
 
-        if 'password' in data and data['password']:
-            user.set_password(data['password'])
+        # Hash only after the conflict and role checks have passed
+        if data.get('password'):
+            user.password_hash = hash_password(data['password'])
 
         try:
             db.session.commit()
@@ -368,8 +478,7 @@ class UserResource(Resource):
             current_app.logger.error(f"Error updating user {user.email}: {e}", exc_info=True)
             ns.abort(500, status='error', message='Could not update user due to a server error')
         
-        dumped_data = base_user_schema.dump(user)
-        result = _populate_computed_fields(user, dumped_data)
+        result = dump_user(user)
         result['status'] = 'success'
         result['message'] = 'User updated successfully'
         return result
@@ -383,26 +492,24 @@ class UserResource(Resource):
     @ns.response(500, 'Server error')
     def delete(self, user_id):
         """Delete a user (Admin action)."""
-        requesting_user_id = get_jwt_identity()
-        
-        if isinstance(requesting_user_id, str):
-            try:
-                requesting_user_id = int(requesting_user_id)
-            except ValueError:
-                ns.abort(401, status='error', message='Invalid user identity')
+        requesting_user_id = current_user_id()
                 
         if user_id == requesting_user_id:
             ns.abort(403, status='error', message='Admins cannot delete their own active account')
             
-        user = User.query.get_or_404(user_id)
-        
+        # Delete by primary key directly; the row count tells us whether it existed
         try:
-            db.session.delete(user)
+            result = db.session.execute(
+                delete(User).where(User.id == user_id).execution_options(synchronize_session=False)
+            )
             db.session.commit()
         except Exception as e:
             db.session.rollback()
-            current_app.logger.error(f"Error deleting user {user.email}: {e}", exc_info=True)
+            current_app.logger.error(f"Error deleting user {user_id}: {e}", exc_info=True)
             ns.abort(500, status='error', message='Could not delete user due to a server error')
+        
+        if result.rowcount == 0:
+            ns.abort(404, status='error', message='User not found')
             
         return {'status': 'success', 'message': 'User deleted successfully'}, 200
 
@@ -417,8 +524,7 @@ class RoleList(Resource):
     @admin_required
     def get(self):
         """List all roles (Admin action)."""
-        roles = Role.query.all()
-        return roles_schema.dump(roles)
+        return [{'id': row.id, 'name': row.name} for row in db.session.execute(_role_list_stmt)]
 
     @ns.expect(role_input_model)
     @ns.marshal_with(role_output_model, code=201)
@@ -431,24 +537,22 @@ class RoleList(Resource):
     @admin_required
     def post(self):
         """Create a new role (Admin action)."""
-        data = request.json
-        val_errors = role_schema.validate(data)
-        if val_errors:
-            ns.abort(400, status='error', errors=val_errors)
+        data = _load_or_400(role_schema)
         
-        if Role.query.filter_by(name=data['name']).first():
+        if _role_name_taken(data['name']):
             ns.abort(409, status='error', message='Role with this name already exists')
         
         new_role = Role(name=data['name'])
         try:
             db.session.add(new_role)
             db.session.commit()
+            role_service.invalidate_role_cache()
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error creating role {data['name']}: {e}", exc_info=True)
             ns.abort(500, status='error', message='Could not create role due to a server error')
             
-        result = role_schema.dump(new_role)
+        result = dump_role(new_role)
         result['status'] = 'success'
         result['message'] = 'Role created successfully'
         return result, 201
@@ -464,8 +568,8 @@ class RoleResource(Resource):
     @admin_required
     def get(self, role_id):
         """Get role details (Admin action)."""
-        role = Role.query.get_or_404(role_id)
-        result = role_schema.dump(role)
+        role = _get_or_404(Role, role_id)
+        result = dump_role(role)
         result['status'] = 'success'
         return result
     
@@ -478,25 +582,23 @@ class RoleResource(Resource):
     @admin_required
     def put(self, role_id):
         """Update role name (Admin action)."""
-        role = Role.query.get_or_404(role_id)
-        data = request.json
-        val_errors = role_schema.validate(data)
-        if val_errors:
-            ns.abort(400, status='error', errors=val_errors)
+        role = _get_or_404(Role, role_id)
+        data = _load_or_400(role_schema)
 
         new_name = data.get('name')
-        if new_name and new_name != role.name and Role.query.filter(Role.name == new_name, Role.id != role_id).first():
+        if new_name and new_name != role.name and _role_name_taken(new_name, exclude_id=role_id):
             ns.abort(409, status='error', message='Role name already in use')
         
         role.name = new_name if new_name else role.name
         try:
             db.session.commit()
+            role_service.invalidate_role_cache()
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f"Error updating role {role.name}: {e}", exc_info=True)
             ns.abort(500, status='error', message='Could not update role due to a server error')
             
-        result = role_schema.dump(role)
+        result = dump_role(role)
         result['status'] = 'success'
         result['message'] = 'Role updated successfully'
         return result
@@ -508,22 +610,30 @@ class RoleResource(Resource):
     @ns.response(403, 'Cannot delete critical role')
     def delete(self, role_id):
         """Delete a role (Admin action)."""
-        role = Role.query.get_or_404(role_id)
-        if role.name.lower() == 'admin': 
+        # Name and usage in one round-trip, without loading a Role object
+        row = db.session.execute(
+            select(Role.name, exists().where(User.role_id == role_id)).where(Role.id == role_id)
+        ).first()
+        if row is None:
+            ns.abort(404, status='error', message='Role not found')
+        role_name, in_use = row
+
+        if role_name.lower() == 'admin': 
             ns.abort(403, status='error', message="Cannot delete the core 'Admin' role")
             
-        if role.name.lower() == current_app.config.get('DEFAULT_USER_ROLE', 'User').lower():
-            ns.abort(403, status='error', message=f"Cannot delete the default system role '{role.name}'")
+        if role_name.lower() == current_app.config.get('DEFAULT_USER_ROLE', 'User').lower():
+            ns.abort(403, status='error', message=f"Cannot delete the default system role '{role_name}'")
 
-        if role.users.first():
-            ns.abort(400, status='error', message=f"Cannot delete role '{role.name}', it is currently assigned to users")
+        if in_use:
+            ns.abort(400, status='error', message=f"Cannot delete role '{role_name}', it is currently assigned to users")
 
         try:
-            db.session.delete(role)
+            db.session.execute(delete(Role).where(Role.id == role_id).execution_options(synchronize_session=False))
             db.session.commit()
+            role_service.invalidate_role_cache()
         except Exception as e:
             db.session.rollback()
-            current_app.logger.error(f"Error deleting role {role.name}: {e}", exc_info=True)
+            current_app.logger.error(f"Error deleting role {role_name}: {e}", exc_info=True)
             ns.abort(500, status='error', message='Could not delete role due to a server error')
             
         return {'status': 'success', 'message': 'Role deleted successfully'}, 200
@@ -548,10 +658,10 @@ class UserCurrencyHandler(Resource):
     @admin_required
     def post(self, user_id):
         """Update a user's currency assignments (batch operation)."""
-        data = request.json
+        data = request.get_json(cache=True)
         
         # Verify user exists
-        user = User.query.get_or_404(user_id)
+        user = _get_or_404(User, user_id)
         
         # Get the currencies to assign
         currencies = data.get('currencies', [])
@@ -568,14 +678,14 @@ class UserCurrencyHandler(Resource):
         
         try:
             # Verify all currencies exist
-            from app.currencies.routes import Currency
+            from app.currencies.models import Currency
             for code in currencies:
                 currency = Currency.query.filter_by(code=code).first()
                 if not currency:
                     return {'status': 'error', 'message': f'Currency {code} not found'}, 404
             
             # Start by getting existing user currencies
-            from app.currencies.routes import UserCurrency
+            from app.currencies.models import UserCurrency
             existing_currencies = UserCurrency.query.filter_by(user_id=user_id).all()
             existing_codes = [c.currency_code for c in existing_currencies]
             
@@ -1,7 +1,8 @@
-from marshmallow import Schema, fields, validate, post_load
-# Ensure models are imported after db initialization or within a context where db is available
-# from app.extensions import db # Not strictly needed for schema definition unless using SQLAlchemyAutoSchema
-from app.users.models import User, Role 
+from marshmallow import Schema, fields, validate
+
+# Validators shared across schemas; built once at import instead of per schema class
+CURRENCY_VALIDATOR = validate.OneOf(["SGD", "IDR"])
+PASSWORD_VALIDATOR = validate.Length(min=8)
 
 class RoleSchema(Schema):
     id = fields.Int(dump_only=True)
@@ -13,21 +14,44 @@ class BaseUserSchema(Schema):
     name = fields.Str(required=True, validate=validate.Length(min=1, max=128))
     email = fields.Email(required=True, validate=validate.Length(max=128))
     google_sso_id = fields.Str(dump_only=True, allow_none=True)
-    # Remove the 'description' parameter which is causing the error
-    role_id = fields.Int(load_only=True, allow_none=True) 
+    role_id = fields.Int(load_only=True, allow_none=True)
     role = fields.Nested(RoleSchema, dump_only=True) # For output, show role details
     is_active = fields.Bool(dump_default=True)
-    currency_context = fields.Str(validate=validate.OneOf(["SGD", "IDR"]), dump_default="SGD")
+    currency_context = fields.Str(validate=CURRENCY_VALIDATOR, dump_default="SGD")
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
 
-    # Computed fields for output, not part of the model itself
-    has_password = fields.Bool(dump_only=True) 
+    # Computed fields for output, read from the User model properties
+    has_password = fields.Bool(dump_only=True)
     is_sso_user = fields.Bool(dump_only=True)
 
+# Hand-written equivalents of RoleSchema().dump / BaseUserSchema().dump for response
+# bodies. They read attributes directly instead of dispatching per field; datetimes
+# are left as objects for the Flask-RESTx response marshaller to format.
+def dump_role(role):
+    """Serialize a Role like RoleSchema().dump(role)."""
+    return {'id': role.id, 'name': role.name}
+
+def dump_user(user):
+    """Serialize a User like BaseUserSchema().dump(user)."""
+    role = user.role
+    return {
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'google_sso_id': user.google_sso_id,
+        'role': dump_role(role) if role is not None else None,
+        'is_active': user.is_active,
+        'currency_context': user.currency_context,
+        'created_at': user.created_at,
+        'updated_at': user.updated_at,
+        'has_password': user.has_password,
+        'is_sso_user': user.is_sso_user
+    }
+
 class UserSchema(BaseUserSchema):
     """Schema for creating users and for full user representation. Password is required for creation."""
-    password = fields.Str(load_only=True, required=True, validate=validate.Length(min=8))
+    password = fields.Str(load_only=True, required=True, validate=PASSWORD_VALIDATOR)
 
 class UserRegistrationSchema(UserSchema):
     """Specifically for admin user registration where password is set."""
@@ -35,18 +59,19 @@ class UserRegistrationSchema(UserSchema):
 
 class UserUpdateAdminSchema(BaseUserSchema):
     """Schema for admins updating user info. Password is optional, email can be changed."""
-    password = fields.Str(load_only=True, required=False, validate=validate.Length(min=8))
+    password = fields.Str(load_only=True, required=False, validate=PASSWORD_VALIDATOR)
     # Email is already in BaseUserSchema, for admin updates it remains `required=False` implicitly due to partial=True usage in route
     email = fields.Email(required=False, validate=validate.Length(max=128)) # Override to make it not required for partial update
 
 class UserProfileUpdateSchema(Schema):
     """Schema for users updating their own profile (/me endpoint)."""
     name = fields.Str(required=False, validate=validate.Length(min=1, max=128))
-    currency_context = fields.Str(required=False, validate=validate.OneOf(["SGD", "IDR"]))
+    currency_context = fields.Str(required=False, validate=CURRENCY_VALIDATOR)
     current_password = fields.Str(load_only=True, required=False) # Required only if new_password is set and user has a password
-    new_password = fields.Str(load_only=True, required=False, validate=validate.Length(min=8))
+    new_password = fields.Str(load_only=True, required=False, validate=PASSWORD_VALIDATOR)
 
 class UserLoginSchema(Schema):
+    """Login payload. The login route checks these inline; kept for reference and reuse."""
     email = fields.Email(required=True)
     password = fields.Str(required=True)
 
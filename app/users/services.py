@@ -1,11 +1,37 @@
 from app.users.repositories import UserRepository, RoleRepository
-from app.users.models import User, Role
+from app.users.models import User, Role, hash_password, hash_password_async, verify_dummy_password
 from app.extensions import db
 from app.core.errors import NotFoundError, ConflictError, BadRequestError, ForbiddenError
-from flask import current_app
+from app.core.transaction import transactional
+from flask import current_app, g, has_app_context
+from sqlalchemy import select, insert, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload, raiseload
+import datetime
+import time
+from functools import lru_cache
+
+def _request_user_cache():
+    """Per-request user cache, or None outside an app context."""
+    if not has_app_context():
+        return None
+    return g.setdefault('_user_cache', {})
+
+@lru_cache(maxsize=None)
+def _protected_role_names(default_role_name):
+    """Casefolded names of the roles that can never be deleted."""
+    return frozenset({'admin', default_role_name.casefold()})
 
 class UserService:
-    """Service layer for user operations."""
+    """Service layer for user operations.
+    
+    Mutating methods are @transactional: they flush, and the request
+    transaction is committed (or rolled back) by app.core.transaction.
+    """
+    
+    # Fields copied straight from the request data; others need extra checks
+    _USER_SIMPLE_FIELDS = ('name', 'is_active', 'currency_context')
+    _PROFILE_SIMPLE_FIELDS = ('name', 'currency_context')
     
     def __init__(self):
         self.user_repo = UserRepository()
@@ -13,19 +39,54 @@ class UserService:
     
     def get_user_by_id(self, user_id):
         """Get user by ID."""
-        user = self.user_repo.get_by_id(user_id)
-        if not user:
-            raise NotFoundError(f"User with ID {user_id} not found")
+        cache = _request_user_cache()
+        user = cache.get(('id', user_id)) if cache is not None else None
+        if user is None:
+            user = self.user_repo.get_by_id(user_id)
+            if not user:
+                raise NotFoundError(f"User with ID {user_id} not found")
+            self._remember_user(user)
         return user
     
     def get_user_by_email(self, email):
         """Get user by email."""
-        return self.user_repo.get_by_email(email)
+        cache = _request_user_cache()
+        user = cache.get(('email', email)) if cache is not None else None
+        if user is None:
+            # Only hits are cached, so a create right after a miss is still seen
+            user = self.user_repo.get_by_email(email)
+            if user:
+                self._remember_user(user)
+        return user
+    
+    def _remember_user(self, user):
+        """Store a user in the per-request cache under its id and email."""
+        cache = _request_user_cache()
+        if cache is not None:
+            cache[('id', user.id)] = user
+            cache[('email', user.email)] = user
     
-    def list_users(self, **filters):
-        """List users with optional filters."""
-        return self.user_repo.list(**filters)
+    def _forget_user(self, user):
+        """Drop a user from the per-request cache after it was changed."""
+        cache = _request_user_cache()
+        if cache:
+            for key in [k for k, v in cache.items() if v is user]:
+                del cache[key]
     
+    def list_users(self, include=('role',), **filters):
+        """List users with optional filters, eagerly loading the relationships in `include`."""
+        options = [selectinload(getattr(User, name)) for name in include]
+        options.append(raiseload('*'))
+        return self.user_repo.list(options, **filters)
+    
+    def list_users_summary(self, cursor=None, limit=50, filters=None):
+        """
+        List lightweight user rows for admin screens, one page at a time.
+        Pass the last row's id as `cursor` to get the next page.
+        """
+        return self.user_repo.list_summary(after_id=cursor, limit=limit, **(filters or {}))
+    
+    @transactional
     def create_user(self, data):
         """Create a new user."""
         if self.get_user_by_email(data['email']):
@@ -38,138 +99,191 @@ class UserService:
             currency_context=data.get('currency_context', current_app.config.get('DEFAULT_CURRENCY', 'SGD'))
         )
         
-        if 'password' in data:
-            user.set_password(data['password'])
-        
         if 'role_id' in data and data['role_id']:
             role = self.role_repo.get_by_id(data['role_id'])
             if not role:
                 raise NotFoundError(f"Role with ID {data['role_id']} not found")
+            # Assign the relationship, not role_id, so user.role is right after the flush
             user.role = role
         
-        try:
-            db.session.add(user)
-            db.session.commit()
-            
-            # After user is created, assign the default currency
-            from app.currencies.models import UserCurrency, Currency
-            if user.currency_context:
-                # Check if currency exists
-                currency = Currency.query.get(user.currency_context)
-                if currency:
-                    # Assign the currency to the user as default
-                    user_currency = UserCurrency(
-                        user_id=user.id,
-                        currency_code=user.currency_context,
-                        is_default=True
-                    )
-                    db.session.add(user_currency)
-                    db.session.commit()
-            
-            return user
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error creating user: {e}")
-            raise
+        # Hash only after the conflict and role checks, so rejected requests
+        # don't spend a bcrypt round
+        if data.get('password'):
+            user.password_hash = hash_password(data['password'])
+        
+        db.session.add(user)
+        db.session.flush()
+        
+        # After user is created, assign the default currency
+        from app.currencies.models import UserCurrency, Currency
+        if user.currency_context:
+            # Check if currency exists
+            currency = Currency.query.get(user.currency_context)
+            if currency:
+                # Assign the currency to the user as default
+                user_currency = UserCurrency(
+                    user_id=user.id,
+                    currency_code=user.currency_context,
+                    is_default=True
+                )
+                db.session.add(user_currency)
+                db.session.flush()
+        
+        self._remember_user(user)
+        return user
 
+    @transactional
+    def bulk_create_users(self, rows):
+        """
+        Create many users with multi-row INSERTs instead of one ORM add per user.
+        Each row takes the same keys as create_user. Returns the number of users created.
+        """
+        if not rows:
+            return 0
+        
+        emails = [row['email'] for row in rows]
+        if len(set(emails)) != len(emails):
+            raise BadRequestError("Duplicate emails in the import")
+        existing = db.session.execute(select(User.email).where(User.email.in_(emails))).scalars().all()
+        if existing:
+            raise ConflictError(f"Users with emails {', '.join(existing)} already exist")
+        
+        role_ids = {row['role_id'] for row in rows if row.get('role_id')}
+        if role_ids:
+            found = set(db.session.execute(select(Role.id).where(Role.id.in_(role_ids))).scalars())
+            missing = role_ids - found
+            if missing:
+                raise NotFoundError(f"Roles with IDs {sorted(missing)} not found")
+        
+        # All checks passed: hash the passwords concurrently on the pool
+        password_hashes = [hash_password_async(row['password']) if row.get('password') else None for row in rows]
+        
+        default_currency = current_app.config.get('DEFAULT_CURRENCY', 'SGD')
+        values = [
+            {
+                'name': row['name'],
+                'email': row['email'],
+                'is_active': row.get('is_active', True),
+                'currency_context': row.get('currency_context', default_currency),
+                'role_id': row.get('role_id') or None,
+                'password_hash': password_hash.result() if password_hash else None,
+            }
+            for row, password_hash in zip(rows, password_hashes)
+        ]
+        
+        db.session.execute(insert(User), values)
+        
+        # Assign each new user's currency_context as their default currency in one statement
+        from app.currencies.models import UserCurrency, Currency
+        now = datetime.datetime.utcnow()
+        db.session.execute(
+            insert(UserCurrency).from_select(
+                ['user_id', 'currency_code', 'is_default', 'created_at', 'updated_at'],
+                select(User.id, User.currency_context, literal(True), literal(now), literal(now))
+                .join(Currency, Currency.code == User.currency_context)
+                .where(User.email.in_(emails))
+            )
+        )
+        return len(values)
+    
+    @transactional
     def update_user(self, user_id, data):
         """Update a user."""
         user = self.get_user_by_id(user_id)
         
+        # Look the role up before changing the user: the query autoflushes, and a
+        # pending duplicate email would fail there instead of in the flush below
+        role = None
+        if data.get('role_id') is not None:
+            role = self.role_repo.get_by_id(data['role_id'])
+            if not role:
+                raise NotFoundError(f"Role with ID {data['role_id']} not found")
+        
         # Keep track of the old currency_context for updating currency assignments
         old_currency_context = user.currency_context
         
-        if 'name' in data:
-            user.name = data['name']
+        for field in self._USER_SIMPLE_FIELDS:
+            if field in data:
+                setattr(user, field, data[field])
         
-        if 'email' in data and data['email'] != user.email:
-            existing_user = self.get_user_by_email(data['email'])
-            if existing_user and existing_user.id != user_id:
-                raise ConflictError(f"Email {data['email']} is already in use")
+        email_changed = 'email' in data and data['email'] != user.email
+        if email_changed:
             user.email = data['email']
         
-        if 'is_active' in data:
-            user.is_active = data['is_active']
-        
-        if 'currency_context' in data and data['currency_context'] != old_currency_context:
-            # Store the new currency_context
-            user.currency_context = data['currency_context']
-        
         if 'role_id' in data:
-            if data['role_id'] is None:
-                user.role_id = None
-            else:
-                role = self.role_repo.get_by_id(data['role_id'])
-                if not role:
-                    raise NotFoundError(f"Role with ID {data['role_id']} not found")
-                user.role_id = role.id
+            # Assign the relationship, not role_id: user.role is already loaded and,
+            # with expire_on_commit=False, would otherwise keep the old role
+            user.role = role
         
-        if 'password' in data and data['password']:
-            user.set_password(data['password'])
+        if data.get('password'):
+            user.password_hash = hash_password(data['password'])
         
         try:
-            db.session.commit()
+            db.session.flush()
+        except IntegrityError as e:
+            # The unique index on users.email catches conflicts without a pre-check query
+            if email_changed:
+                raise ConflictError(f"Email {data['email']} is already in use") from e
+            raise
+        
+        # Update the currency assignments if currency_context has changed
+        if 'currency_context' in data and data['currency_context'] != old_currency_context:
+            from app.currencies.models import UserCurrency, Currency
             
-            # Update the currency assignments if currency_context has changed
-            if 'currency_context' in data and data['currency_context'] != old_currency_context:
-                from app.currencies.models import UserCurrency, Currency
-                
-                # Get the new currency context
-                new_currency = data['currency_context']
+            # Get the new currency context
+            new_currency = data['currency_context']
+            
+            # Make sure the currency exists
+            currency = Currency.query.get(new_currency)
+            if currency:
+                # Check if the user already has this currency assigned
+                existing_assignment = UserCurrency.query.filter_by(
+                    user_id=user.id,
+                    currency_code=new_currency
+                ).first()
                 
-                # Make sure the currency exists
-                currency = Currency.query.get(new_currency)
-                if currency:
-                    # Check if the user already has this currency assigned
-                    existing_assignment = UserCurrency.query.filter_by(
-                        user_id=user.id,
-                        currency_code=new_currency
-                    ).first()
-                    
-                    if existing_assignment:
-                        # Already assigned, just make it the default
-                        if not existing_assignment.is_default:
-                            # Unset current default
-                            UserCurrency.query.filter_by(
-                                user_id=user.id,
-                                is_default=True
-                            ).update({'is_default': False})
-                            
-                            # Set this one as default
-                            existing_assignment.is_default = True
-                            db.session.commit()
-                    else:
-                        # Not assigned yet, create new assignment
-                        # First unset any existing default
+                if existing_assignment:
+                    # Already assigned, just make it the default
+                    if not existing_assignment.is_default:
+                        # Unset current default
                         UserCurrency.query.filter_by(
                             user_id=user.id,
                             is_default=True
                         ).update({'is_default': False})
                         
-                        # Create the new default assignment
-                        user_currency = UserCurrency(
-                            user_id=user.id,
-                            currency_code=new_currency,
-                            is_default=True
-                        )
-                        db.session.add(user_currency)
-                        db.session.commit()
-            
-            return user
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error updating user: {e}")
-            raise
+                        # Set this one as default
+                        existing_assignment.is_default = True
+                        db.session.flush()
+                else:
+                    # Not assigned yet, create new assignment
+                    # First unset any existing default
+                    UserCurrency.query.filter_by(
+                        user_id=user.id,
+                        is_default=True
+                    ).update({'is_default': False})
+                    
+                    # Create the new default assignment
+                    user_currency = UserCurrency(
+                        user_id=user.id,
+                        currency_code=new_currency,
+                        is_default=True
+                    )
+                    db.session.add(user_currency)
+                    db.session.flush()
+        
+        # The email may have changed, so re-key the cached entry
+        self._forget_user(user)
+        self._remember_user(user)
+        return user
     
+    @transactional
     def update_user_profile(self, user_id, data):
         """Update a user's own profile."""
         user = self.get_user_by_id(user_id)
         
-        if 'name' in data:
-            user.name = data['name']
-        
-        if 'currency_context' in data:
-            user.currency_context = data['currency_context']
+        for field in self._PROFILE_SIMPLE_FIELDS:
+            if field in data:
+                setattr(user, field, data[field])
         
         current_password = data.get('current_password')
         new_password = data.get('new_password')
@@ -186,46 +300,80 @@ class UserService:
             if user.password_hash and not user.check_password(current_password):
                 raise BadRequestError("Incorrect current password")
             
-            user.set_password(new_password)
+            user.password_hash = hash_password(new_password)
         
-        try:
-            db.session.commit()
-            return user
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error updating user profile: {e}")
-            raise
+        return user
     
+    @transactional
     def delete_user(self, user_id):
         """Delete a user."""
         user = self.get_user_by_id(user_id)
         
-        try:
-            db.session.delete(user)
-            db.session.commit()
-            return True
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error deleting user: {e}")
-            raise
+        db.session.delete(user)
+        db.session.flush()
+        self._forget_user(user)
+        return True
     
     def authenticate_user(self, email, password):
         """Authenticate a user with email and password."""
         user = self.get_user_by_email(email)
         
-        if not user or not user.password_hash or not user.check_password(password):
+        # Unknown emails and password-less accounts run the dummy verification,
+        # so every path costs the same bcrypt time and reveals nothing.
+        if user and user.password_hash:
+            valid = user.check_password(password)
+        else:
+            valid = verify_dummy_password(password)
+        
+        if not valid:
             return None
         
+        # Only someone who knows the password learns the account is inactive
         if not user.is_active:
             raise ForbiddenError("User account is inactive")
         
         return user
 
 class RoleService:
-    """Service layer for role operations."""
+    """Service layer for role operations.
+    
+    Mutating methods flush but do not commit; see UserService.
+    """
+    
+    # Roles change rarely, so each process keeps {casefolded name: (id, name)}.
+    # This is the only role cache: every role write, here or in the routes,
+    # clears it. That only reaches the local process; other workers keep their
+    # copy until ROLE_CACHE_TTL runs out, so entries are verified against the
+    # database before use and a role created elsewhere may go unseen until then.
+    ROLE_CACHE_TTL = 300
+    _role_cache = None
+    _role_cache_loaded_at = 0.0
     
     def __init__(self):
         self.role_repo = RoleRepository()
+        self.user_repo = UserRepository()
+    
+    @classmethod
+    def _cached_roles(cls):
+        """Return the role cache, reloading it with one query when empty or expired."""
+        now = time.monotonic()
+        if cls._role_cache is None or now - cls._role_cache_loaded_at > cls.ROLE_CACHE_TTL:
+            rows = db.session.execute(select(Role.id, Role.name).order_by(Role.id)).all()
+            cls._role_cache = {name.casefold(): (role_id, name) for role_id, name in rows}
+            cls._role_cache_loaded_at = now
+        return cls._role_cache
+    
+    @classmethod
+    def invalidate_role_cache(cls):
+        """Drop the cached roles after a role is created, renamed or deleted."""
+        cls._role_cache = None
+    
+    @staticmethod
+    def _attach_role(role_id):
+        """Session-bound Role for a cached id, or None if the row no longer exists."""
+        # A primary-key get (identity map first, else one SELECT) rather than
+        # trusting the cache, which may name a role another worker deleted or renamed
+        return db.session.get(Role, role_id)
     
     def get_role_by_id(self, role_id):
         """Get role by ID."""
@@ -234,14 +382,27 @@ class RoleService:
             raise NotFoundError(f"Role with ID {role_id} not found")
         return role
     
+    def get_cached_role(self, role_id):
+        """Session-bound Role for role_id, or None if it does not exist."""
+        return self._attach_role(role_id)
+    
     def get_role_by_name(self, name):
-        """Get role by name."""
-        return self.role_repo.get_by_name(name)
+        """Get role by name (case-insensitive, like the database collation)."""
+        cached = self._cached_roles().get(name.casefold())
+        if not cached:
+            return None
+        role = self._attach_role(cached[0])
+        if role is None or role.name.casefold() != name.casefold():
+            # Deleted or renamed by another worker: drop the stale copy and ask the database
+            self.invalidate_role_cache()
+            role = self.role_repo.get_by_name(name)
+        return role
     
     def list_roles(self):
-        """List all roles."""
-        return self.role_repo.list()
+        """List all roles, as Role objects detached from the session (read-only)."""
+        return [Role(id=role_id, name=name) for role_id, name in self._cached_roles().values()]
     
+    @transactional
     def create_role(self, data):
         """Create a new role."""
         if self.get_role_by_name(data['name']):
@@ -249,54 +410,59 @@ class RoleService:
         
         role = Role(name=data['name'])
         
-        try:
-            db.session.add(role)
-            db.session.commit()
-            return role
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error creating role: {e}")
-            raise
+        db.session.add(role)
+        self.invalidate_role_cache()
+        return role
+    
+    @transactional
+    def bulk_create_roles(self, names):
+        """Create many roles with a single multi-row INSERT. Returns the number of roles created."""
+        if not names:
+            return 0
+        
+        if len(set(names)) != len(names):
+            raise BadRequestError("Duplicate role names in the import")
+        existing = db.session.execute(select(Role.name).where(Role.name.in_(names))).scalars().all()
+        if existing:
+            raise ConflictError(f"Roles with names {', '.join(existing)} already exist")
+        
+        db.session.execute(insert(Role), [{'name': name} for name in names])
+        self.invalidate_role_cache()
+        return len(names)
     
+    @transactional
     def update_role(self, role_id, data):
         """Update a role."""
         role = self.get_role_by_id(role_id)
         
         if 'name' in data and data['name'] != role.name:
-            existing_role = self.get_role_by_name(data['name'])
-            if existing_role:
+            if self.role_repo.name_taken_by_other(data['name'], role_id):
                 raise ConflictError(f"Role name {data['name']} is already in use")
             role.name = data['name']
         
-        try:
-            db.session.commit()
-            return role
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error updating role: {e}")
-            raise
+        self.invalidate_role_cache()
+        return role
     
+    @transactional
     def delete_role(self, role_id):
         """Delete a role."""
         role = self.get_role_by_id(role_id)
         
         # Check core roles
-        if role.name.lower() == 'admin':
-            raise ForbiddenError("Cannot delete the core 'Admin' role")
-        
-        from flask import current_app
-        if role.name.lower() == current_app.config.get('DEFAULT_USER_ROLE', 'User').lower():
+        role_name = role.name.casefold()
+        if role_name in _protected_role_names(current_app.config.get('DEFAULT_USER_ROLE', 'User')):
+            if role_name == 'admin':
+                raise ForbiddenError("Cannot delete the core 'Admin' role")
             raise ForbiddenError(f"Cannot delete the default system role '{role.name}'")
         
         # Check if role is in use
-        if role.users.first():
+        if self.user_repo.any_with_role(role.id):
             raise BadRequestError(f"Cannot delete role '{role.name}', it is currently assigned to users")
         
-        try:
-            db.session.delete(role)
-            db.session.commit()
-            return True
-        except Exception as e:
-            db.session.rollback()
-            current_app.logger.error(f"Error deleting role: {e}")
-            raise
\ No newline at end of file
+        db.session.delete(role)
+        self.invalidate_role_cache()
+        return True
+
+# Services hold no per-request state, so one shared instance of each is enough
+user_service = UserService()
+role_service = RoleService()
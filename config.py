@@ -1,7 +1,23 @@
 import os
+from types import MappingProxyType
 from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool
 
-load_dotenv() # Load environment variables at the beginning
+# Load environment variables at the beginning. Config classes read os.environ
+# when this module is imported, so this can't be deferred to create_app;
+# deployments that export real env vars can set SKIP_DOTENV=1 to skip the file.
+if os.environ.get('SKIP_DOTENV') != '1':
+    load_dotenv(override=False)
+
+def _load_server_api_keys(environ):
+    """Pair SERVER_API_KEY_NAME_<suffix> with SERVER_API_KEY_VALUE_<suffix> in a single pass over the environment."""
+    names, values = {}, {}
+    for key, value in environ.items():
+        if key.startswith('SERVER_API_KEY_NAME_'):
+            names[key[len('SERVER_API_KEY_NAME_'):]] = value
+        elif key.startswith('SERVER_API_KEY_VALUE_'):
+            values[key[len('SERVER_API_KEY_VALUE_'):]] = value
+    return {names[suffix]: values[suffix] for suffix in names if values.get(suffix)}
 
 class Config:
     """Base configuration class."""
@@ -9,6 +25,36 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') # No default
 
+    # --- Database connection pool ---
+    # User lookups by id/email run on almost every request, so size the pool to the
+    # number of threads serving requests in one process instead of the library default.
+    DB_WORKER_THREADS = int(os.environ.get('DB_WORKER_THREADS', 4))
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 2 * DB_WORKER_THREADS)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', DB_WORKER_THREADS)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)), # Below MySQL's wait_timeout
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)), # Seconds to wait for a free connection
+        'pool_pre_ping': True,
+        'query_cache_size': 1200, # Compiled statement cache; the default 500 is shared by every query shape
+        'connect_args': {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5))}, # Fail fast if the DB is unreachable
+    }
+    # Short-lived processes (one-off scripts, serverless) shouldn't keep idle connections
+    if os.environ.get('DB_USE_NULLPOOL', 'False').lower() == 'true':
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'poolclass': NullPool,
+            'query_cache_size': 1200,
+            'connect_args': {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5))},
+        }
+
+    # Register the Flask-RESTx API; scripts and migration runs can turn it off to skip the route imports
+    ENABLE_API = os.environ.get('ENABLE_API', 'True').lower() == 'true'
+
+    # Seed currencies and the default admin on every app start; otherwise run `flask bootstrap` once
+    RUN_STARTUP_BOOTSTRAP = os.environ.get('RUN_STARTUP_BOOTSTRAP', 'False').lower() == 'true'
+
+    # Allowed CORS origins for /api/*, comma-separated (defaults to any origin)
+    CORS_ORIGINS = [o.strip() for o in os.environ.get('CORS_ORIGINS', '*').split(',') if o.strip()]
+
     # --- Google OAuth Credentials & Settings ---
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -21,14 +67,8 @@ class Config:
     DEFAULT_CURRENCY = os.environ.get('DEFAULT_CURRENCY', 'SGD')
     DEFAULT_USER_ROLE = os.environ.get('DEFAULT_USER_ROLE', 'User') # For new SSO users
 
-    # API Keys (example, load more robustly if many keys)
-    SERVER_API_KEYS = {
-        key_name: os.environ.get(key_name)
-        for key_name in os.environ
-        if key_name.startswith('SERVER_API_KEY_NAME_') and os.environ.get(f"SERVER_API_KEY_VALUE_{key_name.split('SERVER_API_KEY_NAME_')[1]}")
-    } # This is a bit complex, consider a simpler pattern or dedicated parsing
-    # A simpler way for a few keys:
-    # SERVER_API_KEY_1 = os.environ.get('SERVER_API_KEY_1') 
+    # API Keys: SERVER_API_KEY_NAME_<suffix> / SERVER_API_KEY_VALUE_<suffix> pairs, as {name: value}
+    SERVER_API_KEYS = _load_server_api_keys(os.environ)
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -56,6 +96,7 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URI', 'sqlite:///:memory:')
+    SQLALCHEMY_ENGINE_OPTIONS = {} # SQLite in-memory doesn't support QueuePool sizing
     JWT_SECRET_KEY = 'test_jwt_secret_key' # Override for test consistency
     SECRET_KEY = 'test_secret_key'       # Override for test consistency
     GOOGLE_CLIENT_ID = 'test_google_client_id'
@@ -64,17 +105,20 @@ class TestingConfig(Config):
     DEFAULT_USER_ROLE = 'TestUser'
     ENV = 'testing'
 
-# Dictionary to map config names to their classes
-config_by_name = {
+# Read-only mapping of config names to their classes
+config_by_name = MappingProxyType({
     'development': DevelopmentConfig,
     'production': ProductionConfig,
     'testing': TestingConfig,
     'default': DevelopmentConfig # Default to development if FLASK_ENV is not set or invalid
-}
+})
+
+# Resolved once at import; FLASK_ENV doesn't change for the life of the process
+CURRENT_CONFIG_CLS = config_by_name.get(os.getenv('FLASK_ENV', 'development'), DevelopmentConfig)
+CURRENT_CONFIG = CURRENT_CONFIG_CLS()
 
 # Helper function to get the config object based on FLASK_ENV or a passed name
 def get_config(config_name_override=None):
     if config_name_override:
         return config_by_name.get(config_name_override, DevelopmentConfig)
-    flask_env = os.getenv('FLASK_ENV', 'development')
-    return config_by_name.get(flask_env, DevelopmentConfig)
+    return CURRENT_CONFIG_CLS
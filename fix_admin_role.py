@@ -3,6 +3,7 @@ Quick script to fix the admin role name through the Flask shell.
 Save as fix_admin_role.py and run with: python fix_admin_role.py
 """
 from flask import Flask
+from sqlalchemy import select
 from app.extensions import db
 from app.users.models import Role
 from main import create_app
@@ -13,10 +14,10 @@ app = create_app()
 # Use the application context
 with app.app_context():
     # Find the admin role with typo
-    admin_role = Role.query.filter(
-        (Role.name == 'Admininstrator') | 
-        (Role.name == 'Administrator')
-    ).first()
+    # roles.name is unique, so this is a single index range scan
+    admin_role = db.session.execute(
+        select(Role).where(Role.name.in_(('Admininstrator', 'Administrator'))).limit(1)
+    ).scalar()
     
     if admin_role:
         print(f"Found admin role with name: {admin_role.name}")
@@ -29,13 +30,13 @@ with app.app_context():
         print(f"Updated role name from '{old_name}' to 'Admin'")
         
         # Verify the change
-        roles = Role.query.all()
+        roles = db.session.execute(select(Role)).scalars().all()
         print("\nCurrent roles in the database:")
         for role in roles:
             print(f"ID: {role.id}, Name: {role.name}")
     else:
         # Check if Admin role already exists
-        admin_exists = Role.query.filter_by(name='Admin').first()
+        admin_exists = db.session.execute(select(Role).where(Role.name == 'Admin')).scalar()
         
         if admin_exists:
             print("Role 'Admin' already exists with ID:", admin_exists.id)
@@ -1,29 +1,52 @@
+import json
 import os
-from flask import Flask, jsonify, request
-from flask_restx import Api
-from dotenv import load_dotenv
+from functools import lru_cache
+from flask import Flask, Response, jsonify, request
 
-from config import get_config, config_by_name
+from config import CURRENT_CONFIG_CLS, config_by_name
 from app.extensions import db, migrate, jwt, oauth
 from flask_cors import CORS
-from app.core.error_handlers import register_error_handlers
-from app.core.logging import configure_logging
-from app.auth.routes import register_oauth_client
 
-# Load environment variables from .env file
-load_dotenv()
+# Environment variables from .env are loaded once when config is imported
+
+# JWT error responses never vary, so their JSON bodies are built once
+_EXPIRED_TOKEN_BODY = json.dumps({
+    'status': 'error',
+    'message': 'The token has expired',
+    'error': 'token_expired'
+}).encode()
+_INVALID_TOKEN_BODY = json.dumps({
+    'status': 'error',
+    'message': 'Signature verification failed',
+    'error': 'invalid_token'
+}).encode()
+_MISSING_TOKEN_BODY = json.dumps({
+    'status': 'error',
+    'message': 'Request does not contain an access token',
+    'error': 'authorization_required'
+}).encode()
+
+@lru_cache(maxsize=8)
+def _resolve_config(config_name=None):
+    """Config class for the given name, or for FLASK_ENV when no name is given."""
+    return config_by_name[config_name] if config_name else CURRENT_CONFIG_CLS
 
 def create_app(config_name=None):
     """Application factory function."""
+    # Imported here so scripts and CLI commands that only need the models
+    # don't pay for Flask-RESTx, Authlib and the route modules at import time
+    from app.core.error_handlers import register_error_handlers
+    from app.core.transaction import register_transaction_handlers
+    from app.core.logging import configure_logging
+
     app = Flask(__name__)
     app.url_map.strict_slashes = False
 
     # Determine configuration to use
-    if config_name:
-        app.config.from_object(config_by_name[config_name])
-    else:
-        env_config_name = os.getenv('FLASK_ENV', 'development')
-        app.config.from_object(config_by_name.get(env_config_name, config_by_name['default']))
+    app.config.from_object(_resolve_config(config_name))
+    
+    # Configure logging before anything below logs through app.logger
+    configure_logging(app)
     
     # Ensure SECRET_KEY is set (crucial for sessions used by Authlib)
     if not app.config.get('SECRET_KEY'):
@@ -47,11 +70,13 @@ def create_app(config_name=None):
     jwt.init_app(app)
     
     # Initialize CORS with proper configuration - only configure it ONCE
+    # Only the API is called cross-origin; browsers may cache preflights for a day
     CORS(app, 
-        resources={r"/*": {
-            "origins": "*",
+        resources={r"/api/*": {
+            "origins": app.config.get('CORS_ORIGINS', '*'),
             "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "max_age": 86400
         }}
     )
     
@@ -60,43 +85,21 @@ def create_app(config_name=None):
     # Register error handlers
     register_error_handlers(app)
     
-    # Configure logging
-    configure_logging(app)
+    # Commit once per request instead of once per service call
+    register_transaction_handlers(app)
     
-    # Set up JWT error handlers
+    # Set up JWT error handlers (bodies are serialized once, at import)
     @jwt.expired_token_loader
     def expired_token_callback(jwt_header, jwt_payload):
-        return jsonify({
-            'status': 'error',
-            'message': 'The token has expired',
-            'error': 'token_expired'
-        }), 401
+        return Response(_EXPIRED_TOKEN_BODY, status=401, mimetype='application/json')
 
     @jwt.invalid_token_loader
     def invalid_token_callback(error):
-        return jsonify({
-            'status': 'error',
-            'message': 'Signature verification failed',
-            'error': 'invalid_token'
-        }), 401
+        return Response(_INVALID_TOKEN_BODY, status=401, mimetype='application/json')
 
     @jwt.unauthorized_loader
     def missing_token_callback(error):
-        return jsonify({
-            'status': 'error',
-            'message': 'Request does not contain an access token',
-            'error': 'authorization_required'
-        }), 401
-
-    # Initialize Flask-RESTx Api
-    api = Api(
-        app,
-        version='1.0',
-        title='Integrated Business Operations Platform API',
-        description='API for managing orders, invoicing, payments, contacts, inventory, and more.',
-        doc='/api/v1/doc/',  # Move doc route under the API prefix
-        prefix='/api/v1'
-    )
+        return Response(_MISSING_TOKEN_BODY, status=401, mimetype='application/json')
 
     # Simple health check route
     @app.route('/health')
@@ -109,28 +112,18 @@ def create_app(config_name=None):
 
     # Register Blueprints/Namespaces within app_context
     with app.app_context():
-        # Register OAuth client
-        register_oauth_client(oauth, app.config)
-
-        # Register API namespaces
-        from app.users.routes import ns as users_ns
-        api.add_namespace(users_ns, path='/users')
-
-        from app.auth.routes import ns as auth_ns
-        api.add_namespace(auth_ns, path='/auth')
-
-        # Import the currencies namespace
-        from app.currencies.routes import ns as currencies_ns, initialize_currencies
-        api.add_namespace(currencies_ns, path='/currencies')
-
-        # Initialize currencies after all namespaces are registered (around line 82-85)
-        try:
-            initialize_currencies()
-        except Exception as e:
-            app.logger.error(f"Error initializing currencies: {e}")
+        if app.config.get('ENABLE_API', True):
+            _register_api(app)
         
-        # Create default admin user if no users exist
-        create_default_admin(app)
+        # Seed currencies and the default admin only when asked to; otherwise
+        # this runs once per deployment through `flask bootstrap`
+        if app.config.get('RUN_STARTUP_BOOTSTRAP'):
+            run_bootstrap(app)
+
+    @app.cli.command('bootstrap')
+    def bootstrap_command():
+        """Seed default currencies and create the default admin user."""
+        run_bootstrap(app)
 
     app.logger.info(f"Application created with configuration: {app.config.get('ENV', config_name)}")
     
@@ -143,16 +136,58 @@ def create_app(config_name=None):
 
     return app
 
+def _register_api(app):
+    """Create the Flask-RESTx Api and register the OAuth client and API namespaces."""
+    from flask_restx import Api
+    from app.auth.routes import register_oauth_client
+
+    # Register OAuth client
+    register_oauth_client(oauth, app.config)
+
+    # Initialize Flask-RESTx Api
+    api = Api(
+        app,
+        version='1.0',
+        title='Integrated Business Operations Platform API',
+        description='API for managing orders, invoicing, payments, contacts, inventory, and more.',
+        doc='/api/v1/doc/',  # Move doc route under the API prefix
+        prefix='/api/v1'
+    )
+
+    # Register API namespaces
+    from app.users.routes import ns as users_ns
+    api.add_namespace(users_ns, path='/users')
+
+    from app.auth.routes import ns as auth_ns
+    api.add_namespace(auth_ns, path='/auth')
+
+    # Import the currencies namespace
+    from app.currencies.routes import ns as currencies_ns
+    api.add_namespace(currencies_ns, path='/currencies')
+
+def run_bootstrap(app):
+    """Seed the default currencies and create the default admin user if no users exist."""
+    from app.currencies.routes import initialize_currencies
+
+    with app.app_context():
+        try:
+            initialize_currencies()
+        except Exception as e:
+            app.logger.error(f"Error initializing currencies: {e}")
+
+    create_default_admin(app)
+
 def create_default_admin(app):
     """Create a default admin user if no users exist in the database."""
     with app.app_context():
         try:
+            from sqlalchemy import select
             from app.users.models import User, Role
             
-            # Check if we have any users
-            user_count = User.query.count()
+            # Check if we have any users; one row is enough, no need to count them all
+            has_users = db.session.execute(select(User.id).limit(1)).first() is not None
             
-            if user_count == 0:
+            if not has_users:
                 # Get admin credentials from environment variables (.env file)
                 admin_email = os.environ.get('DEFAULT_ADMIN_EMAIL')
                 admin_password = os.environ.get('DEFAULT_ADMIN_PASSWORD')
@@ -164,12 +199,11 @@ def create_default_admin(app):
                 
                 app.logger.info(f"No users found in database. Creating default admin user with email: {admin_email}...")
                 
-                # Create admin role if it doesn't exist
-                admin_role = Role.query.filter_by(name='Admin').first()
+                # Role and user go in together: one transaction, one commit
+                admin_role = db.session.execute(select(Role).where(Role.name == 'Admin')).scalar()
                 if not admin_role:
                     admin_role = Role(name='Admin')
                     db.session.add(admin_role)
-                    db.session.commit()
                     app.logger.info("Admin role created")
                 
                 # Create admin user
@@ -187,9 +221,10 @@ def create_default_admin(app):
                 app.logger.info(f"Default admin user created with email: {admin_email}")
                 app.logger.warning("SECURITY NOTICE: Default admin user created with preset password. Please change it immediately after login.")
             else:
-                app.logger.info(f"Database already has {user_count} users. Skipping default admin creation.")
+                app.logger.info("Database already has users. Skipping default admin creation.")
                 
         except Exception as e:
+            db.session.rollback()
             app.logger.error(f"Error creating default admin user: {e}")
             # Don't raise the exception - let the application start anyway
 
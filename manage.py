@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands that share one Flask application.
+Run with: python manage.py reset-admin reset-alembic
+Commands can be chained; the app is created once for all of them.
+"""
+import click
+from sqlalchemy import select, text
+
+from app.extensions import db
+from app.users.models import User
+from main import create_app
+
+def reset_admin_password():
+    """Reset the default admin user's password. Must run inside an app context."""
+    # Find the admin user with one lookup on the email index
+    admin = db.session.execute(
+        select(User).where(User.email == 'admin@example.com')
+    ).scalar_one_or_none()
+    
+    if admin:
+        print(f"Found admin user: {admin.email}")
+        # Reset the password
+        admin.set_password('AdminPassword123')
+        db.session.commit()
+        print("Admin password reset successfully")
+    else:
+        print("Admin user not found")
+
+def drop_alembic_version():
+    """Drop the alembic_version table. Must run inside an app context."""
+    with db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    print("alembic_version table dropped successfully")
+
+@click.group(chain=True)
+@click.pass_context
+def cli(ctx):
+    """Maintenance commands for the application database."""
+    app_context = create_app().app_context()
+    app_context.push()
+    ctx.call_on_close(app_context.pop)
+
+@cli.command('reset-admin')
+def reset_admin_command():
+    """Reset the default admin user's password."""
+    reset_admin_password()
+
+@cli.command('reset-alembic')
+def reset_alembic_command():
+    """Drop the alembic_version table."""
+    drop_alembic_version()
+
+if __name__ == '__main__':
+    cli()
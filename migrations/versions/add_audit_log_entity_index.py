@@ -0,0 +1,39 @@
+"""Index audit_logs by (entity_type, entity_id)
+
+Revision ID: audit_log_entity_index
+Revises: user_currency_default_index
+Create Date: 2025-05-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import logging
+
+
+# revision identifiers, used by Alembic.
+revision = 'audit_log_entity_index'
+down_revision = 'user_currency_default_index'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic')
+
+
+def upgrade():
+    # Audit lookups filter on entity_type and entity_id together; one composite
+    # index serves those and entity_type-only lookups
+    op.create_index('ix_audit_logs_entity', 'audit_logs', ['entity_type', 'entity_id'])
+
+    # Tables created outside create_all_tables may lack the single-column indexes
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('audit_logs')}
+    dropped = [name for name in ('ix_audit_logs_entity_type', 'ix_audit_logs_entity_id') if name in existing]
+    for name in dropped:
+        op.drop_index(name, table_name='audit_logs')
+    logger.info("audit_log_entity_index completed: created ix_audit_logs_entity, dropped %s",
+                ', '.join(dropped) or 'nothing')
+
+
+def downgrade():
+    op.create_index('ix_audit_logs_entity_type', 'audit_logs', ['entity_type'])
+    op.create_index('ix_audit_logs_entity_id', 'audit_logs', ['entity_id'])
+    op.drop_index('ix_audit_logs_entity', table_name='audit_logs')
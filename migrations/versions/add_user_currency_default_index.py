@@ -0,0 +1,39 @@
+"""Index user_currencies by (user_id, is_default)
+
+Revision ID: user_currency_default_index
+Revises: create_all_tables
+Create Date: 2025-05-20 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import logging
+
+
+# revision identifiers, used by Alembic.
+revision = 'user_currency_default_index'
+down_revision = 'create_all_tables'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic')
+
+
+def upgrade():
+    # Default-currency lookups filter on user_id and is_default together
+    op.create_index('ix_uc_user_default', 'user_currencies', ['user_id', 'is_default'])
+
+    # uq_user_currency and the new index both lead with user_id, so the
+    # single-column index is redundant. Tables created before create_all_tables
+    # added it don't have it, so only drop it where it exists.
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('user_currencies')}
+    if 'ix_user_currencies_user_id' in existing:
+        op.drop_index('ix_user_currencies_user_id', table_name='user_currencies')
+        logger.info("user_currency_default_index completed: created ix_uc_user_default, dropped ix_user_currencies_user_id")
+    else:
+        logger.info("user_currency_default_index completed: created ix_uc_user_default")
+
+
+def downgrade():
+    op.create_index('ix_user_currencies_user_id', 'user_currencies', ['user_id'])
+    op.drop_index('ix_uc_user_default', table_name='user_currencies')
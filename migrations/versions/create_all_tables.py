@@ -1,5 +1,8 @@
 """Create all required tables
 
+MySQL/MariaDB only: the bulk load toggles FOREIGN_KEY_CHECKS and the Admin
+role is inserted with INSERT IGNORE.
+
 Revision ID: create_all_tables
 Revises: 
 Create Date: 2025-05-13 20:00:00.000000
@@ -7,7 +10,7 @@ Create Date: 2025-05-13 20:00:00.000000
 """
 from alembic import op
 import sqlalchemy as sa
-from sqlalchemy.exc import OperationalError
+import logging
 
 
 # revision identifiers, used by Alembic.
@@ -16,202 +19,137 @@ down_revision = None  # This is the first migration
 branch_labels = None
 depends_on = None
 
+logger = logging.getLogger('alembic')
+
+# All tables live on one MetaData so upgrade() can create the missing ones in a
+# single create_all pass, in foreign-key order
+_metadata = sa.MetaData()
+
+_roles = sa.Table('roles', _metadata,
+    sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
+    sa.Column('name', sa.String(64), nullable=False, unique=True),
+    sa.PrimaryKeyConstraint('id')
+)
+
+_users = sa.Table('users', _metadata,
+    sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
+    sa.Column('name', sa.String(128), nullable=False),
+    sa.Column('email', sa.String(128), nullable=False, index=True, unique=True),
+    sa.Column('password_hash', sa.String(255)),
+    sa.Column('google_sso_id', sa.String(255), unique=True, nullable=True),
+    sa.Column('role_id', sa.Integer(), sa.ForeignKey('roles.id'), nullable=True),
+    sa.Column('is_active', sa.Boolean(), default=True),
+    sa.Column('currency_context', sa.String(3), default='SGD'),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'),
+              server_onupdate=sa.text('CURRENT_TIMESTAMP')),
+    sa.PrimaryKeyConstraint('id')
+)
+
+_currencies = sa.Table('currencies', _metadata,
+    sa.Column('code', sa.String(3), primary_key=True),
+    sa.Column('name', sa.String(50), nullable=False),
+    sa.Column('symbol', sa.String(5), nullable=False),
+    sa.Column('is_active', sa.Boolean(), server_default=sa.text('1')),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'),
+              server_onupdate=sa.text('CURRENT_TIMESTAMP')),
+)
+
+_user_currencies = sa.Table('user_currencies', _metadata,
+    sa.Column('id', sa.Integer(), autoincrement=True, primary_key=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('currency_code', sa.String(3), nullable=False),
+    sa.Column('is_default', sa.Boolean(), server_default=sa.text('0')),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'),
+              server_onupdate=sa.text('CURRENT_TIMESTAMP')),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['currency_code'], ['currencies.code'], ondelete='CASCADE'),
+    # uq_user_currency is added in upgrade() after the initial bulk load
+)
+
+_audit_logs = sa.Table('audit_logs', _metadata,
+    sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
+    sa.Column('entity_type', sa.String(64), nullable=False, index=True),
+    sa.Column('entity_id', sa.Integer(), nullable=False, index=True),
+    sa.Column('action', sa.String(16), nullable=False, index=True),
+    sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+    sa.Column('data', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+)
+
 
 def upgrade():
     conn = op.get_bind()
     
-    # Create roles table first
-    try:
-        op.create_table('roles',
-            sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
-            sa.Column('name', sa.String(64), nullable=False, unique=True),
-            sa.PrimaryKeyConstraint('id')
-        )
-        print("Created roles table")
-    except OperationalError as e:
-        if "already exists" in str(e):
-            print("Table 'roles' already exists, skipping creation")
-        else:
-            raise
+    # Tables that already exist are left alone, and so is their data
+    existing_tables = set(sa.inspect(conn).get_table_names())
     
-    # Create users table with reference to roles
-    try:
-        op.create_table('users',
-            sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
-            sa.Column('name', sa.String(128), nullable=False),
-            sa.Column('email', sa.String(128), nullable=False, index=True, unique=True),
-            sa.Column('password_hash', sa.String(255)),
-            sa.Column('google_sso_id', sa.String(255), unique=True, nullable=True),
-            sa.Column('role_id', sa.Integer(), sa.ForeignKey('roles.id'), nullable=True),
-            sa.Column('is_active', sa.Boolean(), default=True),
-            sa.Column('currency_context', sa.String(3), default='SGD'),
-            sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
-            sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'),
-                      server_onupdate=sa.text('CURRENT_TIMESTAMP')),
-            sa.PrimaryKeyConstraint('id')
-        )
-        print("Created users table")
-    except OperationalError as e:
-        if "already exists" in str(e):
-            print("Table 'users' already exists, skipping creation")
-        else:
-            raise
+    # Create every missing table in one pass; checkfirst replaces matching
+    # "already exists" error text per table
+    _metadata.create_all(bind=conn, checkfirst=True)
+    steps = [f"created {table.name}" for table in _metadata.sorted_tables
+             if table.name not in existing_tables]
     
-    # Create currencies table
-    try:
-        op.create_table('currencies',
-            sa.Column('code', sa.String(3), primary_key=True),
-            sa.Column('name', sa.String(50), nullable=False),
-            sa.Column('symbol', sa.String(5), nullable=False),
-            sa.Column('is_active', sa.Boolean(), server_default=sa.text('1')),
-            sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
-            sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'),
-                    server_onupdate=sa.text('CURRENT_TIMESTAMP')),
-        )
-        print("Created currencies table")
-        
-        # Insert initial currency data (only if we created the table)
-        op.bulk_insert(
-            sa.table('currencies',
-                sa.column('code', sa.String),
-                sa.column('name', sa.String),
-                sa.column('symbol', sa.String),
-                sa.column('is_active', sa.Boolean)
-            ),
-            [
-                {'code': 'SGD', 'name': 'Singapore Dollar', 'symbol': 'S$', 'is_active': True},
-                {'code': 'IDR', 'name': 'Indonesian Rupiah', 'symbol': 'Rp', 'is_active': True},
-                {'code': 'USD', 'name': 'US Dollar', 'symbol': '$', 'is_active': True},
-                {'code': 'EUR', 'name': 'Euro', 'symbol': '€', 'is_active': True},
-                {'code': 'GBP', 'name': 'British Pound', 'symbol': '£', 'is_active': True},
-                {'code': 'JPY', 'name': 'Japanese Yen', 'symbol': '¥', 'is_active': True},
-                {'code': 'AUD', 'name': 'Australian Dollar', 'symbol': 'A$', 'is_active': True},
-                {'code': 'CNY', 'name': 'Chinese Yuan', 'symbol': '¥', 'is_active': True}
-            ]
-        )
-        print("Inserted currency data")
-    except OperationalError as e:
-        if "already exists" in str(e):
-            print("Table 'currencies' already exists, skipping creation")
-        else:
-            raise
+    if 'currencies' not in existing_tables:
+        # Insert initial currency data (only if we created the table) as a
+        # single multi-row VALUES statement rather than an executemany
+        conn.execute(_currencies.insert().values([
+            {'code': 'SGD', 'name': 'Singapore Dollar', 'symbol': 'S$', 'is_active': True},
+            {'code': 'IDR', 'name': 'Indonesian Rupiah', 'symbol': 'Rp', 'is_active': True},
+            {'code': 'USD', 'name': 'US Dollar', 'symbol': '$', 'is_active': True},
+            {'code': 'EUR', 'name': 'Euro', 'symbol': '€', 'is_active': True},
+            {'code': 'GBP', 'name': 'British Pound', 'symbol': '£', 'is_active': True},
+            {'code': 'JPY', 'name': 'Japanese Yen', 'symbol': '¥', 'is_active': True},
+            {'code': 'AUD', 'name': 'Australian Dollar', 'symbol': 'A$', 'is_active': True},
+            {'code': 'CNY', 'name': 'Chinese Yuan', 'symbol': '¥', 'is_active': True}
+        ]))
+        steps.append("seeded currencies")
     
-    # Create user_currencies table (after both users and currencies exist)
-    try:
-        op.create_table('user_currencies',
-            sa.Column('id', sa.Integer(), autoincrement=True, primary_key=True),
-            sa.Column('user_id', sa.Integer(), nullable=False),
-            sa.Column('currency_code', sa.String(3), nullable=False),
-            sa.Column('is_default', sa.Boolean(), server_default=sa.text('0')),
-            sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
-            sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'),
-                    server_onupdate=sa.text('CURRENT_TIMESTAMP')),
-            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
-            sa.ForeignKeyConstraint(['currency_code'], ['currencies.code'], ondelete='CASCADE'),
-            sa.UniqueConstraint('user_id', 'currency_code', name='uq_user_currency')
-        )
-        print("Created user_currencies table")
-        
-        # Add index on user_id for faster lookups
-        op.create_index('ix_user_currencies_user_id', 'user_currencies', ['user_id'])
-        print("Created index on user_currencies.user_id")
-        
+    if 'user_currencies' not in existing_tables:
         # Try to migrate existing user preferences to user_currencies table
         try:
-            # Get all users with currency_context
-            result = conn.execute(sa.text("SELECT id, currency_context FROM users WHERE currency_context IS NOT NULL"))
-            users = result.fetchall()
-            
-            # Insert into user_currencies table
-            for user_id, currency_code in users:
-                # Skip if currency code is invalid
-                valid_currency = conn.execute(
-                    sa.text("SELECT 1 FROM currencies WHERE code = :currency_code"),
-                    {"currency_code": currency_code}
-                ).fetchone()
-                
-                if not valid_currency:
-                    continue
-                    
-                # Check if assignment already exists to avoid duplicates
-                existing = conn.execute(
-                    sa.text("SELECT 1 FROM user_currencies WHERE user_id = :user_id AND currency_code = :currency_code"),
-                    {"user_id": user_id, "currency_code": currency_code}
-                ).fetchone()
-                
-                if existing:
-                    continue
-                    
-                # Insert the user currency assignment
+            # Copy every user's currency_context in one statement into the table
+            # created above. The join keeps only known codes, so both foreign keys
+            # hold and InnoDB's per-row FK checks can be skipped.
+            conn.execute(sa.text("SET FOREIGN_KEY_CHECKS = 0"))
+            try:
                 conn.execute(
                     sa.text(
-                        "INSERT INTO user_currencies (user_id, currency_code, is_default) VALUES (:user_id, :currency_code, 1)"
-                    ),
-                    {"user_id": user_id, "currency_code": currency_code}
+                        "INSERT INTO user_currencies (user_id, currency_code, is_default) "
+                        "SELECT u.id, u.currency_context, 1 FROM users u "
+                        "JOIN currencies c ON c.code = u.currency_context"
+                    )
                 )
-            print("Successfully migrated user currency preferences")
+            finally:
+                conn.execute(sa.text("SET FOREIGN_KEY_CHECKS = 1"))
+            steps.append("migrated user currency preferences")
         except Exception as e:
-            print(f"Warning: Could not migrate existing user currency preferences: {e}")
-    except OperationalError as e:
-        if "already exists" in str(e):
-            print("Table 'user_currencies' already exists, skipping creation")
-        else:
-            raise
+            logger.warning("Could not migrate existing user currency preferences: %s", e)
+        
+        # Build the unique constraint and the user_id index after the bulk load,
+        # in one sorted pass each instead of per inserted row
+        op.create_unique_constraint('uq_user_currency', 'user_currencies', ['user_id', 'currency_code'])
+        op.create_index('ix_user_currencies_user_id', 'user_currencies', ['user_id'])
+        steps.append("indexed user_currencies")
     
-    # Create audit_logs table
-    try:
-        op.create_table('audit_logs',
-            sa.Column('id', sa.Integer(), nullable=False, autoincrement=True),
-            sa.Column('entity_type', sa.String(64), nullable=False, index=True),
-            sa.Column('entity_id', sa.Integer(), nullable=False, index=True),
-            sa.Column('action', sa.String(16), nullable=False, index=True),
-            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
-            sa.Column('timestamp', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
-            sa.Column('data', sa.Text(), nullable=True),
-            sa.PrimaryKeyConstraint('id')
-        )
-        print("Created audit_logs table")
-    except OperationalError as e:
-        if "already exists" in str(e):
-            print("Table 'audit_logs' already exists, skipping creation")
-        else:
-            raise
+    # Create initial Admin role if it doesn't exist; the unique index on
+    # roles.name turns a re-run into a no-op instead of an error
+    result = conn.execute(sa.text("INSERT IGNORE INTO roles (name) VALUES ('Admin')"))
+    if result.rowcount:
+        steps.append("created Admin role")
     
-    # Create initial Admin role if it doesn't exist
-    try:
-        conn.execute(
-            sa.text("INSERT INTO roles (name) VALUES ('Admin')")
-        )
-        print("Created Admin role")
-    except Exception as e:
-        # Likely a duplicate entry error, role exists
-        print(f"Admin role likely exists: {e}")
+    # One summary line instead of a print per step
+    logger.info("create_all_tables completed: %s", ', '.join(steps) or 'nothing to do')
 
 
 def downgrade():
-    # Drop tables in reverse order (dependencies first)
-    try:
-        op.drop_table('audit_logs')
-    except:
-        pass
-        
-    try:
-        op.drop_index('ix_user_currencies_user_id', table_name='user_currencies')
-        op.drop_table('user_currencies')
-    except:
-        pass
-        
-    try:
-        op.drop_table('currencies')
-    except:
-        pass
-        
-    try:
-        op.drop_table('users')
-    except:
-        pass
-        
-    try:
-        op.drop_table('roles')
-    except:
-        pass
\ No newline at end of file
+    # Drop tables in reverse order (dependencies first). IF EXISTS keeps this
+    # re-runnable without swallowing real errors; indexes go with their tables.
+    op.execute("DROP TABLE IF EXISTS audit_logs")
+    op.execute("DROP TABLE IF EXISTS user_currencies")
+    op.execute("DROP TABLE IF EXISTS currencies")
+    op.execute("DROP TABLE IF EXISTS users")
+    op.execute("DROP TABLE IF EXISTS roles")
@@ -1,27 +1,12 @@
 #!/usr/bin/env python3
 """
 Reset admin password script with proper Flask application context.
-Save as reset_admin.py
+Thin wrapper around `python manage.py reset-admin`.
 """
-from flask import Flask
-from app.extensions import db
-from app.users.models import User
-import os
-from main import create_app
+from manage import cli
 
-# Create the Flask app with application context
-app = create_app()
+def main():
+    cli(['reset-admin'])
 
-# Use the application context
-with app.app_context():
-    # Find the admin user
-    admin = User.query.filter_by(email='admin@example.com').first()
-    
-    if admin:
-        print(f"Found admin user: {admin.email}")
-        # Reset the password
-        admin.set_password('AdminPassword123')
-        db.session.commit()
-        print("Admin password reset successfully")
-    else:
-        print("Admin user not found")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
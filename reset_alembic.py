@@ -1,11 +1,11 @@
+"""
+Drop the alembic_version table.
+Thin wrapper around `python manage.py reset-alembic`.
+"""
+from manage import cli
 
-from app.extensions import db
-from flask import Flask
-from main import create_app
+def main():
+    cli(['reset-alembic'])
 
-app = create_app()
-
-with app.app_context():
-    # Drop alembic_version table
-    db.engine.execute("DROP TABLE IF EXISTS alembic_version")
-    print("alembic_version table dropped successfully")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
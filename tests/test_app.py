@@ -0,0 +1,16 @@
+from sqlalchemy.orm import configure_mappers
+
+from main import create_app
+
+
+def test_create_app_boots():
+    """The app factory imports every route module and the mappers configure."""
+    app = create_app('testing')
+    assert app.testing
+    
+    # Relationships referenced at import time (e.g. User.role) must resolve
+    configure_mappers()
+    
+    response = app.test_client().get('/health')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'healthy'
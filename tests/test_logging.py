@@ -0,0 +1,33 @@
+import logging
+
+from main import create_app
+
+
+class _CountingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+    
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_each_record_is_emitted_once(monkeypatch):
+    """Records from app.logger and app.* loggers reach the queue handler once and nothing else."""
+    app = create_app('testing')
+    
+    from app.core import logging as app_logging
+    queued = []
+    monkeypatch.setattr(app_logging._queue_handler, 'emit', queued.append)
+    
+    root_handler = _CountingHandler()
+    logging.getLogger().addHandler(root_handler)
+    try:
+        app.logger.info('from the app logger')
+        logging.getLogger('app.users.routes').info('from a module logger')
+    finally:
+        logging.getLogger().removeHandler(root_handler)
+    
+    assert [record.getMessage() for record in queued] == ['from the app logger', 'from a module logger']
+    assert root_handler.records == []
+    assert app.logger.handlers == [app_logging._queue_handler]